@@ -10,11 +10,17 @@ from openregistry.lots.core.validation import (
 )
 from openregistry.lots.core.utils import (
     get_now,
-    calculate_business_date,
     apply_patch,
     save_lot,
     validate_with,
 )
+from openregistry.lots.loki.business_date import calculate_business_date
+from openregistry.lots.loki.prototypes import (
+    create_default_auctions,
+    create_default_contract,
+    create_platform_legal_details_document
+)
+from openregistry.lots.loki.state_machine import lot_state_machine
 from openregistry.lots.loki.utils import (
     check_status,
     update_auctions,
@@ -24,10 +30,7 @@ from .constants import (
     STATUS_CHANGES,
     RECTIFICATION_PERIOD_DURATION,
     ITEM_EDITING_STATUSES,
-    DEFAULT_DUTCH_STEPS,
     DECISION_EDITING_STATUSES,
-    CONTRACT_TYPE,
-    PLATFORM_LEGAL_DETAILS_DOC_DATA
 )
 from .validation import (
     validate_pending_status,
@@ -42,6 +45,7 @@ class LokiLotConfigurator(LotConfigurator):
 
     name = "Loki Lot configurator"
     available_statuses = STATUS_CHANGES
+    state_machine = lot_state_machine
     item_editing_allowed_statuses = ITEM_EDITING_STATUSES
     decision_editing_allowed_statuses = DECISION_EDITING_STATUSES
 
@@ -103,32 +107,18 @@ class LokiLotManagerAdapter(LotManagerAdapter):
     def _create_auctions(self, request):
         lot = request.validated['lot']
         lot.date = get_now()
-        auction_types = ['sellout.english', 'sellout.english', 'sellout.insider']
-        auction_class = lot.__class__.auctions.model_class
-        for tenderAttempts, auction_type in enumerate(auction_types, 1):
-            data = dict()
-            data['tenderAttempts'] = tenderAttempts
-            data['procurementMethodType'] = auction_type
-            data['status'] = 'scheduled'
-            data['auctionParameters'] = {}
-            if auction_type == 'sellout.english':
-                data['auctionParameters']['type'] = 'english'
-            elif auction_type == 'sellout.insider':
-                data['auctionParameters']['type'] = 'insider'
-                data['auctionParameters']['dutchSteps'] = DEFAULT_DUTCH_STEPS
-            data['__parent__'] = lot
-            lot.auctions.append(auction_class(data))
+        for auction in create_default_auctions(lot.__class__.auctions.model_class):
+            auction.__parent__ = lot
+            lot.auctions.append(auction)
         update_auctions(lot)
 
     def _create_contracts(self, request):
         lot = request.validated['lot']
-        contract_class = lot.__class__.contracts.model_class
-        lot.contracts.append(contract_class({'type': CONTRACT_TYPE}))
+        lot.contracts.append(create_default_contract(lot.__class__.contracts.model_class))
 
     def _add_x_PlatformLegalDetails_document(self, request):
         lot = request.validated['lot']
-        document_class = lot.__class__.documents.model_class
-        document = document_class(PLATFORM_LEGAL_DETAILS_DOC_DATA)
+        document = create_platform_legal_details_document(lot.__class__.documents.model_class)
         lot.documents.append(document)
 
     def create_lot(self, request):
@@ -146,6 +136,6 @@ class LokiLotManagerAdapter(LotManagerAdapter):
         elif request.validated['data'].get('status') == 'pending' and not request.context.rectificationPeriod:
             self._set_rectificationPeriod(request)
 
+        process_lot_status_change(request)
         if request.authenticated_role in ('concierge', 'Administrator'):
-            process_lot_status_change(request)
             request.validated['lot_src'] = self.context.serialize('plain')
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Memoized business dates
+
+Rectification period, auction start and chronograph checks calculate business
+dates with the same constant deltas, from starts such as ``get_now()`` which
+differ on every call but fall on the same few dates. Core
+``calculate_business_date`` either moves the start by a number of days, keeping
+its time, or, for a start on a day off, counts from the midnight of the next
+working day. So results are kept in a bounded LRU cache keyed on the date of
+the start, the other arguments and the lot fields sandbox acceleration is read
+from: the result for the midnight of the date and whether results move with
+the time of the start.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+
+from openregistry.lots.core.utils import calculate_business_date as calculate_business_date_uncached
+
+from openregistry.lots.loki.constants import BUSINESS_DATE_CACHE_SIZE
+
+ACCELERATION_FIELDS = ('mode', 'sandboxParameters', 'procurementMethodDetails')
+
+
+class LRUCache(object):
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            value = self._data.pop(key)
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+_cache = LRUCache(BUSINESS_DATE_CACHE_SIZE)
+
+
+def get_acceleration_key(context):
+    return tuple(getattr(context, name, None) for name in ACCELERATION_FIELDS)
+
+
+def _calculate_for_date(start, delta, context, working_days):
+    """(result for midnight of the date of `start`, whether results move with time of start)"""
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    noon = midnight + timedelta(hours=12)
+    midnight_result = calculate_business_date_uncached(
+        start=midnight, delta=delta, context=context, working_days=working_days
+    )
+    noon_result = calculate_business_date_uncached(start=noon, delta=delta, context=context, working_days=working_days)
+    return midnight_result, noon_result - midnight_result == noon - midnight
+
+
+def calculate_business_date(start, delta, context=None, working_days=False, **kwargs):
+    """Cached core calculate_business_date, other keyword arguments bypass the cache"""
+    if kwargs:
+        return calculate_business_date_uncached(
+            start=start, delta=delta, context=context, working_days=working_days, **kwargs
+        )
+    key = (start.date(), start.utcoffset(), delta, working_days, get_acceleration_key(context))
+    cached = _cache.get(key)
+    if cached is None:
+        cached = _calculate_for_date(start, delta, context, working_days)
+        _cache.set(key, cached)
+    midnight_result, moves_with_start = cached
+    if moves_with_start:
+        return midnight_result + (start - start.replace(hour=0, minute=0, second=0, microsecond=0))
+    return midnight_result
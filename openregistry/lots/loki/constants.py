@@ -134,6 +134,42 @@ DAYS_AFTER_RECTIFICATION_PERIOD = timedelta(days=2)
 
 DEFAULT_DUTCH_STEPS = 99
 
+# Fields of the second english and insider auctions calculated from the first english auction,
+# as (field name, whether amount is halved)
+DERIVED_AUCTION_FIELDS = (
+    ('value', True),
+    ('minimalStep', True),
+    ('registrationFee', False),
+    ('guarantee', True),
+    ('bankAccount', False),
+)
+
+# Maximum number of lots fetched and stored with a single couchdb request
+# during the bulk chronograph check
+CHRONOGRAPH_BULK_SIZE = 500
+
+# AddRelatedProcessesStep: lots migrated and saved by a worker at once,
+# number of workers and number of assets fetched with a single request
+MIGRATION_CHUNK_SIZE = 100
+MIGRATION_WORKERS = 4
+MIGRATION_ASSETS_FETCH_SIZE = 500
+# Number of memoized business dates
+BUSINESS_DATE_CACHE_SIZE = 4096
+
+# Seconds after which lock of a migration process, which didn't release it, expires
+MIGRATION_LOCK_TTL = 24 * 60 * 60
+
+# Bulk lot creation: maximum number of lots in a request
+# and number of lots stored with a single couchdb request
+BULK_CREATE_MAX_LOTS = 1000
+BULK_CREATE_CHUNK_SIZE = 100
+
+DUE_LOTS_FEED_LIMIT = 100
+DUE_LOTS_FEED_MAX_LIMIT = 1000
+
+# Maximum page size of lot items and documents listings
+COLLECTION_MAX_LIMIT = 1000
+
 DEFAULT_LOT_TYPE = 'loki'
 DEFAULT_REGISTRATION_FEE_BEFORE_2019 = 744.6
 DEFAULT_REGISTRATION_FEE_AFTER_2019 = 834.6
@@ -142,3 +178,5 @@ DECISION_EDITING_STATUSES = ['pending', 'composing']
 CURRENCY_CHOICES = ['UAH']
 DEFAULT_LEVEL_OF_ACCREDITATION = {'create': [1],
                                   'edit': [2]}
+
+PROFILES_BUFFER_SIZE = 500
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import json
+
+from couchdb.design import ViewDefinition
+
+
+LOKI_DESIGN = 'loki'
+
+LOTS_BY_NEXT_CHECK = u'''function(doc) {
+    var lotTypes = %s;
+    if(doc.doc_type == 'Lot' && doc.next_check && lotTypes.indexOf(doc.lotType) != -1) {
+        emit([doc.next_check, doc._id], null);
+    }
+}'''
+
+
+def lots_by_next_check_view(lot_types):
+    return ViewDefinition(LOKI_DESIGN, 'by_next_check', LOTS_BY_NEXT_CHECK % json.dumps(sorted(lot_types)))
+
+
+def sync_design(db, lot_types):
+    views = [
+        lots_by_next_check_view(lot_types),
+    ]
+    ViewDefinition.sync_many(db, views)
@@ -2,14 +2,28 @@
 import logging
 
 from pyramid.interfaces import IRequest
+from pyramid.settings import asbool
 
 from openregistry.lots.core.interfaces import IContentConfigurator, ILotManager
 
-from openregistry.lots.loki.models import Lot, ILokiLot
+from openregistry.lots.loki.models import (
+    Lot,
+    ILokiLot,
+    Auction,
+    Contract,
+    LotDecision,
+    LotDocument,
+    AuctionDocument,
+)
 from openregistry.lots.loki.adapters import LokiLotConfigurator, LokiLotManagerAdapter
+from openregistry.lots.loki.design import sync_design
+from openregistry.lots.loki.renderers import RENDERER_NAME, JSONRenderer
+from openregistry.lots.loki.roles import validate_role_tables
+from openregistry.lots.loki.serialization import precompile
+from openregistry.lots.loki.utils import get_lot_state
 from openregistry.lots.loki.migration import (
     LokiMigrationsRunner,
-    MIGRATION_STEPS,
+    get_schema_version,
 )
 from openregistry.lots.loki.constants import (
     DEFAULT_LOT_TYPE,
@@ -22,6 +36,11 @@ LOGGER = logging.getLogger(__name__)
 def includeme(config, plugin_config=None):
     config.scan("openregistry.lots.loki.views")
     config.scan("openregistry.lots.loki.subscribers")
+    config.add_request_method(get_lot_state, 'lot_state', reify=True)
+    config.add_renderer(RENDERER_NAME, JSONRenderer)
+    config.add_tween('openregistry.lots.loki.metrics.metrics_tween_factory')
+    config.add_tween('openregistry.lots.loki.profiling.profiling_tween_factory')
+    config.registry.loki_profiling = asbool(plugin_config.get('profiling', False))
     configurator = (LokiLotConfigurator, (ILokiLot, IRequest), IContentConfigurator)
     manager = (LokiLotManagerAdapter, (ILokiLot,), ILotManager)
     for adapter in (configurator, manager):
@@ -32,12 +51,24 @@ def includeme(config, plugin_config=None):
         lot_types.append(DEFAULT_LOT_TYPE)
     for lt in lot_types:
         config.add_lotType(Lot, lt)
+    sync_design(config.registry.db, lot_types)
+
+    # fail on role names resolved by get_role but missing in model roles
+    validate_role_tables()
+
+    # compile role transforms used for serialization
+    for model_class in (Lot, Auction, Contract, LotDecision, LotDocument, AuctionDocument):
+        precompile(model_class)
     LOGGER.info("Included openregistry.lots.loki plugin", extra={'MESSAGE_ID': 'included_plugin'})
 
-    # migrate data
-    if plugin_config.get('migration') is True:
-        runner = LokiMigrationsRunner(config.registry.db)
-        runner.migrate(MIGRATION_STEPS)
+    # data is migrated with loki_migrate command, only report if it wasn't yet
+    schema_version = get_schema_version(config.registry.db)
+    if schema_version < LokiMigrationsRunner.SCHEMA_VERSION:
+        LOGGER.warning(
+            "Lots schema version is %s while %s is expected, run loki_migrate",
+            schema_version, LokiMigrationsRunner.SCHEMA_VERSION,
+            extra={'MESSAGE_ID': 'loki_migration_required'}
+        )
 
     # add accreditation level
     if not plugin_config.get('accreditation'):
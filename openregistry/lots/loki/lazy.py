@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Lists of sub-models converted on first access
+
+A lot document carries all its items, documents, decisions, auctions and
+contracts. ``LazyListType`` keeps them as raw dicts in a ``LazyModelList``
+and converts an element to its model only when it's accessed, so a request
+touching one contract doesn't convert every document of the lot. Elements
+are found by id in an index built on the first lookup, kept on append and
+dropped by other changes of the list.
+
+Validation accesses every element, so conversion errors of elements are
+raised by ``validate`` instead of by creation of the parent model.
+"""
+from collections import MutableSequence
+
+from six import string_types
+from schematics.types.compound import ListType
+
+
+class LazyModelList(MutableSequence):
+    """Elements of `field` kept as given until accessed"""
+
+    __hash__ = None
+
+    def __init__(self, field, items=(), context=None):
+        self.field = field
+        self.context = context
+        self.__parent__ = None
+        self._items = list(items)
+        self._index = None
+
+    def _load(self, index):
+        item = self._items[index]
+        if not isinstance(item, self.field.model_class):
+            item = self._items[index] = self.field.to_native(item, self.context)
+            if self.__parent__ is not None:
+                item.__parent__ = self.__parent__
+        return item
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._load(i) for i in range(*index.indices(len(self._items)))]
+        return self._load(index)
+
+    def _get_id(self, index):
+        item = self._items[index]
+        if isinstance(item, dict) and isinstance(item.get('id'), string_types):
+            return item['id']
+        # id of a new element may be generated or coerced by conversion
+        return self._load(index).id
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = {}
+            for position in range(len(self._items)):
+                self._index.setdefault(self._get_id(position), []).append(position)
+        return self._index
+
+    def __setitem__(self, index, value):
+        self._items[index] = value
+        self._index = None
+
+    def __delitem__(self, index):
+        del self._items[index]
+        self._index = None
+
+    def __iter__(self):
+        index = 0
+        while index < len(self._items):
+            yield self._load(index)
+            index += 1
+
+    def insert(self, index, value):
+        appended = index >= len(self._items)
+        self._items.insert(index, value)
+        if self._index is not None and appended:
+            position = len(self._items) - 1
+            self._index.setdefault(self._get_id(position), []).append(position)
+        else:
+            self._index = None
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, LazyModelList)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._items)
+
+    def loaded(self):
+        """(index, model) of elements converted so far"""
+        return [
+            (index, item) for index, item in enumerate(self._items)
+            if isinstance(item, self.field.model_class)
+        ]
+
+    def id_index(self):
+        """Positions of elements by id, not to be changed by callers"""
+        return self._get_index()
+
+    def positions(self, id):
+        """Positions of elements with `id`, e.g. of all versions of a document"""
+        return list(self._get_index().get(id, ()))
+
+
+def get_positions(collection, id):
+    """Positions of elements with `id` in lazy or plain list `collection`"""
+    if isinstance(collection, LazyModelList):
+        return collection.positions(id)
+    return [position for position, item in enumerate(collection or ()) if item.id == id]
+
+
+class LazyListType(ListType):
+    """ListType of models converting elements on first access"""
+
+    def to_native(self, value, context=None):
+        if isinstance(value, LazyModelList):
+            return value
+        return LazyModelList(self.field, self._force_list(value), context)
+
+
+class LazyListsMixin(object):
+    """Pass model as parent to elements of its lazy lists"""
+
+    def __init__(self, *args, **kwargs):
+        super(LazyListsMixin, self).__init__(*args, **kwargs)
+        self._adopt_lazy_lists()
+
+    def import_data(self, *args, **kwargs):
+        result = super(LazyListsMixin, self).import_data(*args, **kwargs)
+        self._adopt_lazy_lists()
+        return result
+
+    def _adopt_lazy_lists(self):
+        for value in self._data.values():
+            if isinstance(value, LazyModelList):
+                value.__parent__ = self
+                for _, item in value.loaded():
+                    item.__parent__ = self
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""In-process metrics of loki lots in Prometheus text format
+
+Counters and histograms are kept per process and rendered by the
+``/lots/loki/metrics`` view, so each worker is scraped on its own.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from timeit import default_timer
+
+from openregistry.lots.core.utils import get_now
+
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+HOUR = 60 * 60
+DAY = 24 * HOUR
+STATUS_DURATION_BUCKETS = (60, HOUR, 6 * HOUR, DAY, 3 * DAY, 7 * DAY, 14 * DAY, 30 * DAY, 90 * DAY, 365 * DAY)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+TRANSITIONS_ENVIRON_KEY = 'openregistry.lots.loki.transitions'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return u'{}'.format(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+class Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(u'{} expects labels {}'.format(self.name, ', '.join(self.labelnames)))
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _format_labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return u'{{{}}}'.format(u','.join(u'{}="{}"'.format(name, _escape(value)) for name, value in pairs))
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            u'# HELP {} {}'.format(self.name, self.documentation),
+            u'# TYPE {} {}'.format(self.name, self.type),
+        ]
+        for name, labels, value in self.samples():
+            lines.append(u'{}{} {}'.format(name, labels, _format_value(value)))
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, self._format_labels(key), value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = [[0] * len(self.buckets), 0.0]
+            counts = self._values[key]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def get(self, **labels):
+        """(bucket counts, sum) observed with `labels`"""
+        counts, total = self._values.get(self._key(labels), [[0] * len(self.buckets), 0.0])
+        return list(counts), total
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + '_bucket', self._format_labels(key, [('le', _format_value(bound))]), cumulative
+            yield self.name + '_sum', self._format_labels(key), total
+            yield self.name + '_count', self._format_labels(key), cumulative
+
+
+class Registry(object):
+
+    def __init__(self):
+        self.metrics = OrderedDict()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(u'Metric {} is already registered'.format(metric.name))
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return u'\n'.join(lines) + u'\n'
+
+
+registry = Registry()
+
+LOT_TRANSITIONS = registry.counter(
+    'loki_lot_transitions_total', 'Lot status transitions',
+    ('from_status', 'to_status', 'trigger')
+)
+LOT_STATUS_DURATION = registry.histogram(
+    'loki_lot_status_duration_seconds', 'Time lots spent in a status before leaving it',
+    ('status',), buckets=STATUS_DURATION_BUCKETS
+)
+VIEW_DURATION = registry.histogram(
+    'loki_view_duration_seconds', 'Latency of loki views',
+    ('view', 'method', 'code')
+)
+VALIDATOR_REJECTIONS = registry.counter(
+    'loki_validator_rejections_total', 'Requests rejected by loki validators',
+    ('validator',)
+)
+
+
+def get_status_date(lot):
+    """Date when `lot` got its current status, from the latest revision changing it"""
+    for revision in reversed(lot.revisions):
+        if any(change.get('path') == '/status' for change in revision.changes):
+            return revision.date
+    return lot.date
+
+
+def observe_transition(request, lot, from_status, to_status, trigger, now=None):
+    """Count transition of `lot` once `request` is answered without errors
+
+    The lot is saved after the transition, so a transition of a request
+    failing to save it isn't counted. Time in `from_status` is measured
+    before the status change is added to revisions.
+    """
+    status_date = get_status_date(lot)
+    duration = None
+    if status_date:
+        duration = max(((now or get_now()) - status_date).total_seconds(), 0)
+    transitions = request.environ.get(TRANSITIONS_ENVIRON_KEY)
+    if transitions is None:
+        transitions = request.environ[TRANSITIONS_ENVIRON_KEY] = []
+        request.add_response_callback(_observe_saved_transitions)
+    transitions.append((lot.id, from_status, to_status, trigger, duration))
+
+
+def discard_transitions(request, lot_ids):
+    """Don't count transitions of lots with `lot_ids`, which failed to be saved"""
+    transitions = request.environ.get(TRANSITIONS_ENVIRON_KEY)
+    if transitions:
+        lot_ids = set(lot_ids)
+        transitions[:] = [transition for transition in transitions if transition[0] not in lot_ids]
+
+
+def _observe_saved_transitions(request, response):
+    if response.status_code >= 400:
+        return
+    for _, from_status, to_status, trigger, duration in request.environ.pop(TRANSITIONS_ENVIRON_KEY, ()):
+        LOT_TRANSITIONS.inc(from_status=from_status, to_status=to_status, trigger=trigger)
+        if duration is not None:
+            LOT_STATUS_DURATION.observe(duration, status=from_status)
+
+
+def count_rejections(validator):
+    """Count requests rejected by `validator`, either raising or adding errors"""
+    @wraps(validator)
+    def wrapper(request, *args, **kwargs):
+        errors_count = len(request.errors)
+        try:
+            result = validator(request, *args, **kwargs)
+        except Exception as e:
+            # nested validators count the rejection once, in the innermost one
+            if not getattr(e, 'rejected_by', None):
+                e.rejected_by = validator.__name__
+                VALIDATOR_REJECTIONS.inc(validator=validator.__name__)
+            raise
+        if len(request.errors) > errors_count:
+            VALIDATOR_REJECTIONS.inc(validator=validator.__name__)
+        return result
+    return wrapper
+
+
+def metrics_tween_factory(handler, registry):
+    """Tween measuring latency of loki views"""
+    def metrics_tween(request):
+        start = default_timer()
+        code = 500
+        try:
+            response = handler(request)
+            code = response.status_code
+            return response
+        finally:
+            route = getattr(request, 'matched_route', None)
+            if route is not None and 'loki:' in route.name:
+                VIEW_DURATION.observe(default_timer() - start, view=route.name, method=request.method, code=code)
+    return metrics_tween
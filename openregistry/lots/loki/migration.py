@@ -1,12 +1,31 @@
 # -*- coding: utf-8 -*-
+import argparse
+import inspect
+import json
 import logging
+import os
+import socket
+import sys
 
+from itertools import islice
+from multiprocessing.dummy import Pool
+from time import time
 from uuid import uuid4
 
+from couchdb import Server
+from couchdb.http import ResourceConflict
+from pkg_resources import iter_entry_points
+
 from openregistry.lots.core.migration import (
     BaseMigrationsRunner,
     BaseMigrationStep,
 )
+from openregistry.lots.loki.constants import (
+    MIGRATION_ASSETS_FETCH_SIZE,
+    MIGRATION_CHUNK_SIZE,
+    MIGRATION_LOCK_TTL,
+    MIGRATION_WORKERS,
+)
 
 
 LOGGER = logging.getLogger(__name__)
@@ -16,13 +35,124 @@ class LokiMigrationsRunner(BaseMigrationsRunner):
 
     SCHEMA_VERSION = 1
     SCHEMA_DOC = 'openregistry_lots_loki_schema'
+    LOCK_DOC = 'openregistry_lots_loki_migration_lock'
+
+
+def get_schema_version(db):
+    return (db.get(LokiMigrationsRunner.SCHEMA_DOC) or {}).get('version')
+
+
+def acquire_lock(db, ttl=MIGRATION_LOCK_TTL):
+    """Save lock document unless other process holds it, return the lock or None"""
+    lock = db.get(LokiMigrationsRunner.LOCK_DOC) or {'_id': LokiMigrationsRunner.LOCK_DOC}
+    if lock.get('expires', 0) > time():
+        return None
+    lock['owner'] = '{}:{}'.format(socket.gethostname(), os.getpid())
+    lock['expires'] = time() + ttl
+    try:
+        db.save(lock)
+    except ResourceConflict:
+        return None
+    return lock
+
+
+def release_lock(db, lock):
+    db.delete(lock)
 
 
 class AddRelatedProcessesStep(BaseMigrationStep):
 
+    CHECKPOINT_DOC = 'openregistry_lots_loki_related_processes_checkpoint'
+    NO_IDENTIFIER_STATUSES = ('draft', 'composing', 'verification', 'invalid')
+
+    chunk_size = MIGRATION_CHUNK_SIZE
+    workers = MIGRATION_WORKERS
+    assets_fetch_size = MIGRATION_ASSETS_FETCH_SIZE
+
     def setUp(self):
         self.view = 'lot/all'
 
+    def count_documents(self):
+        """Number of lots the step would migrate"""
+        return sum(1 for rows in self._iter_chunks() for row in rows if not self._skip_predicate(row.doc))
+
+    def migrate(self):
+        """Migrate lots by chunks in a pool of workers
+
+        Position of the last migrated window of chunks is saved to CHECKPOINT_DOC,
+        so an interrupted migration is resumed from it. The checkpoint is removed
+        when all lots are migrated.
+        """
+        db = self.resources.db
+        checkpoint = db.get(self.CHECKPOINT_DOC) or {'_id': self.CHECKPOINT_DOC}
+        if 'startkey' in checkpoint:
+            LOGGER.info('Resuming migration of lots after %s', checkpoint['startkey_docid'])
+        chunks = self._iter_chunks(checkpoint.get('startkey'), checkpoint.get('startkey_docid'))
+
+        pool = Pool(self.workers)
+        started = time()
+        scanned = migrated = 0
+        failed = []
+        try:
+            while True:
+                window = list(islice(chunks, self.workers))
+                if not window:
+                    break
+                for chunk_migrated, chunk_failed in pool.map(self._migrate_chunk, window):
+                    migrated += chunk_migrated
+                    failed.extend(chunk_failed)
+                scanned += sum(len(rows) for rows in window)
+                if not failed:
+                    checkpoint['startkey'] = window[-1][-1].key
+                    checkpoint['startkey_docid'] = window[-1][-1].id
+                    db.save(checkpoint)
+                LOGGER.info('Scanned %d lots, migrated %d, failed %d: %.1f lots/sec',
+                            scanned, migrated, len(failed), scanned / max(time() - started, 1e-6))
+        finally:
+            pool.close()
+            pool.join()
+
+        if failed:
+            LOGGER.error('Failed to save lots %s, rerun migration to retry', ', '.join(failed))
+        elif '_rev' in checkpoint:
+            db.delete(checkpoint)
+
+    def _iter_chunks(self, startkey=None, startkey_docid=None):
+        options = {}
+        if startkey_docid is not None:
+            options = {'startkey': startkey, 'startkey_docid': startkey_docid, 'skip': 1}
+        while True:
+            rows = self.resources.db.view(self.view, limit=self.chunk_size, include_docs=True, **options).rows
+            if not rows:
+                return
+            yield rows
+            options = {'startkey': rows[-1].key, 'startkey_docid': rows[-1].id, 'skip': 1}
+
+    def _migrate_chunk(self, rows):
+        lots = [row.doc for row in rows if not self._skip_predicate(row.doc)]
+        if not lots:
+            return 0, []
+        assets = self._get_assets(lots)
+        for lot in lots:
+            self._migrate_assets_to_related_processes(lot, assets)
+        failed = [doc_id for success, doc_id, _ in self.resources.db.update(lots) if not success]
+        return len(lots) - len(failed), failed
+
+    def _get_assets(self, lots):
+        """Assets referenced by `lots` fetched with _all_docs by chunks"""
+        asset_ids = sorted(set(
+            asset_id
+            for lot in lots if lot['status'] not in self.NO_IDENTIFIER_STATUSES
+            for asset_id in lot['assets']
+        ))
+        assets = {}
+        for i in range(0, len(asset_ids), self.assets_fetch_size):
+            rows = self.resources.db.view(
+                '_all_docs', keys=asset_ids[i:i + self.assets_fetch_size], include_docs=True
+            )
+            assets.update((row.key, row.doc) for row in rows if row.doc)
+        return assets
+
     def _skip_predicate(self, lot):
         has_rp = lot.get('relatedProcesses')
         target_lot_types = self.resources.aliases_info.get_package_aliases('openregistry.lots.loki')
@@ -40,7 +170,7 @@ class AddRelatedProcessesStep(BaseMigrationStep):
 
         return lot
 
-    def _migrate_assets_to_related_processes(self, lot):
+    def _migrate_assets_to_related_processes(self, lot, assets=None):
         lot['relatedProcesses'] = []
         for asset_id in lot['assets']:
             related_process = {
@@ -48,8 +178,8 @@ class AddRelatedProcessesStep(BaseMigrationStep):
                     'relatedProcessID': asset_id,
                     'type': 'asset'
                 }
-            if lot['status'] not in ['draft', 'composing', 'verification', 'invalid']:
-                asset = self.resources.db.get(asset_id)
+            if lot['status'] not in self.NO_IDENTIFIER_STATUSES:
+                asset = assets[asset_id] if assets is not None else self.resources.db.get(asset_id)
                 related_process['identifier'] = asset['assetID']
 
             lot['relatedProcesses'].append(related_process)
@@ -62,6 +192,80 @@ MIGRATION_STEPS = (
 )
 
 
-def migrate(resources):
+def migrate(resources, dry_run=False):
+    """Apply MIGRATION_STEPS, or return number of lots each of them would migrate when `dry_run`"""
+    if dry_run:
+        return dict((step.__name__, step(resources).count_documents()) for step in MIGRATION_STEPS)
     runner = LokiMigrationsRunner(resources)
     runner.migrate(MIGRATION_STEPS)
+
+
+class AliasesInfo(object):
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+
+    def get_package_aliases(self, package):
+        return self.aliases.get(package, ())
+
+
+class MigrationResources(object):
+
+    def __init__(self, db, aliases_info):
+        self.db = db
+        self.aliases_info = aliases_info
+
+
+def supports_dry_run(migration):
+    """Whether `migration` entry point takes dry_run keyword"""
+    func = migration if inspect.isfunction(migration) or inspect.ismethod(migration) else migration.__call__
+    try:
+        spec = inspect.getargspec(func)
+    except TypeError:
+        return False
+    return 'dry_run' in spec.args or spec.keywords is not None
+
+
+def main(argv=None):
+    """Run migrations registered with `lots.loki.migration` entry point
+
+    An entry point is a callable taking MigrationResources. It may also take
+    a `dry_run` keyword, then with ``--dry-run`` it's called with
+    ``dry_run=True`` and returns number of lots each of its steps would
+    migrate. Entry points without `dry_run` are skipped by ``--dry-run``.
+    """
+    parser = argparse.ArgumentParser(description='Migrate openregistry.lots.loki lots')
+    parser.add_argument('--couchdb-url', default='http://localhost:5984/')
+    parser.add_argument('--db-name', default='openregistry')
+    parser.add_argument('--aliases', default='loki', help='comma separated loki lot types')
+    parser.add_argument('--dry-run', action='store_true', help='only report how many lots each step would migrate')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    db = Server(args.couchdb_url)[args.db_name]
+    aliases_info = AliasesInfo({'openregistry.lots.loki': tuple(args.aliases.split(','))})
+    resources = MigrationResources(db, aliases_info)
+    entry_points = list(iter_entry_points('lots.loki.migration'))
+
+    if args.dry_run:
+        report = {}
+        for entry_point in entry_points:
+            migration = entry_point.load()
+            if not supports_dry_run(migration):
+                LOGGER.warning('Migration %s does not support dry run, skipped', entry_point.name)
+                continue
+            report[entry_point.name] = migration(resources, dry_run=True)
+        sys.stdout.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        return 0
+
+    lock = acquire_lock(db)
+    if lock is None:
+        LOGGER.info('Migration is run by other process')
+        return 1
+    try:
+        for entry_point in entry_points:
+            entry_point.load()(resources)
+    finally:
+        release_lock(db, lock)
+    LOGGER.info('Lots schema version is %s', get_schema_version(db))
+    return 0
@@ -4,7 +4,7 @@ from datetime import datetime
 from pyramid.security import Allow
 from schematics.types import StringType, IntType, FloatType
 from schematics.exceptions import ValidationError
-from schematics.types.compound import ModelType, ListType
+from schematics.types.compound import ModelType
 from schematics.types.serializable import serializable
 from zope.interface import implementer
 from openregistry.lots.core.constants import (
@@ -41,10 +41,11 @@ from openregistry.lots.core.models import (
 )
 from openregistry.lots.core.utils import (
     get_now,
-    calculate_business_date,
     time_dependent_value
 )
 
+from openregistry.lots.loki.business_date import calculate_business_date
+from openregistry.lots.loki.lazy import LazyListsMixin, LazyListType
 from openregistry.lots.loki.constants import (
     LOT_STATUSES,
     AUCTION_STATUSES,
@@ -62,6 +63,34 @@ from openregistry.lots.loki.roles import (
     decision_roles,
     auction_period_roles,
     contracts_roles,
+    lot_role_table,
+    auction_role_table,
+    contract_role_table,
+)
+from openregistry.lots.loki.serialization import CompiledRolesMixin
+
+
+OWNER_PERMISSIONS = (
+    'edit_lot',
+    'upload_lot_documents',
+    'upload_lot_items',
+    'upload_lot_auctions',
+    'upload_lot_decisions',
+    'upload_lot_auction_documents',
+    'create_related_process',
+    'edit_related_process',
+    'delete_related_process',
+)
+
+GROUPS_ACL = (
+    (Allow, 'g:concierge', 'upload_lot_auctions'),
+    (Allow, 'g:convoy', 'upload_lot_auctions'),
+    (Allow, 'g:convoy', 'upload_lot_contracts'),
+    (Allow, 'g:caravan', 'upload_lot_contracts'),
+    (Allow, 'g:concierge', 'edit_related_process'),
+    (Allow, 'g:convoy', 'create_related_process'),
+    (Allow, 'g:convoy', 'edit_related_process'),
+    (Allow, 'g:convoy', 'delete_related_process'),
 )
 
 
@@ -75,12 +104,12 @@ class StartDateRequiredPeriod(Period):
     startDate = IsoDateTimeType(required=True)
 
 
-class AuctionDocument(Document):
+class AuctionDocument(CompiledRolesMixin, Document):
     documentType = StringType(choices=AUCTION_DOCUMENT_TYPES, required=True)
     documentOf = StringType(choices=['auction'])
 
 
-class LotDocument(Document):
+class LotDocument(CompiledRolesMixin, Document):
     documentType = StringType(choices=LOT_DOCUMENT_TYPES, required=True)
 
 
@@ -107,7 +136,7 @@ class RegistrationFee(LokiGuarantee):
         return self.amount
 
 
-class LotDecision(Decision):
+class LotDecision(CompiledRolesMixin, Decision):
     class Options:
         roles = decision_roles
     decisionOf = StringType(choices=['lot', 'asset'], default='lot')
@@ -122,7 +151,7 @@ class LotDecision(Decision):
         return role
 
 
-class Auction(Model):
+class Auction(CompiledRolesMixin, LazyListsMixin, Model):
     class Options:
         roles = auction_roles
 
@@ -138,7 +167,7 @@ class Auction(Model):
     guarantee = ModelType(LokiGuarantee)
     registrationFee = ModelType(RegistrationFee)
     bankAccount = ModelType(BankAccount)
-    documents = ListType(ModelType(AuctionDocument), default=list())
+    documents = LazyListType(ModelType(AuctionDocument), default=list())
     auctionParameters = ModelType(AuctionParameters)
     tenderingDuration = IsoDurationType()
     submissionMethodDetails = StringType()
@@ -173,20 +202,14 @@ class Auction(Model):
                 )
 
     def get_role(self):
-        root = self.__parent__.__parent__
-        request = root.request
-        if request.authenticated_role == 'Administrator':
-            role = 'Administrator'
-        elif request.authenticated_role == 'convoy':
-            role = 'convoy'
-        elif request.authenticated_role == 'concierge':
-            role = 'concierge'
-        else:
-            role = 'edit_{}.{}'.format(request.context.tenderAttempts, request.context.procurementMethodType)
-        return role
+        request = self.__parent__.__parent__.request
+        auction = request.context
+        return auction_role_table.resolve(
+            request.authenticated_role, (auction.tenderAttempts, auction.procurementMethodType)
+        )
 
 
-class Contract(Model):
+class Contract(CompiledRolesMixin, Model):
     class Options:
         roles = contracts_roles
 
@@ -197,17 +220,12 @@ class Contract(Model):
     type = StringType()
 
     def get_role(self):
-        root = self.__parent__.__parent__
-        request = root.request
-        if request.authenticated_role == 'caravan':
-            role = 'caravan'
-        if request.authenticated_role == 'convoy':
-            role = 'convoy'
-        return role
+        request = self.__parent__.__parent__.request
+        return contract_role_table.resolve(request.authenticated_role)
 
 
 @implementer(ILokiLot)
-class Lot(BaseLot):
+class Lot(CompiledRolesMixin, LazyListsMixin, BaseLot):
     class Options:
         roles = lot_roles
 
@@ -219,37 +237,24 @@ class Lot(BaseLot):
     lotCustodian = ModelType(AssetCustodian, serialize_when_none=False)
     lotHolder = ModelType(AssetHolder, serialize_when_none=False)
     officialRegistrationID = StringType(serialize_when_none=False)
-    items = ListType(ModelType(Item), default=list(), validators=[validate_items_uniq])
-    documents = ListType(ModelType(LotDocument), default=list())
-    decisions = ListType(ModelType(LotDecision), default=list(), validators=[validate_decision_uniq])
-    relatedProcesses = ListType(ModelType(RelatedProcess), default=list(), max_size=1)
-    auctions = ListType(ModelType(Auction), default=list(), max_size=3)
-    contracts = ListType(ModelType(Contract), default=list())
+    items = LazyListType(ModelType(Item), default=list(), validators=[validate_items_uniq])
+    documents = LazyListType(ModelType(LotDocument), default=list())
+    decisions = LazyListType(ModelType(LotDecision), default=list(), validators=[validate_decision_uniq])
+    relatedProcesses = LazyListType(ModelType(RelatedProcess), default=list(), max_size=1)
+    auctions = LazyListType(ModelType(Auction), default=list(), max_size=3)
+    contracts = LazyListType(ModelType(Contract), default=list())
 
     _internal_type = 'loki'
 
     def get_role(self):
-        root = self.__parent__
-        request = root.request
-        if request.authenticated_role == 'Administrator':
-            role = 'Administrator'
-        elif request.authenticated_role == 'concierge':
-            role = 'concierge'
-        elif request.authenticated_role == 'convoy':
-            role = 'convoy'
-        elif request.authenticated_role == 'chronograph':
-            role = 'chronograph'
-        elif request.authenticated_role == 'caravan':
-            role = 'caravan'
-        else:
-            after_rectificationPeriod = bool(
-                request.context.rectificationPeriod and
-                request.context.rectificationPeriod.endDate < get_now()
-            )
-            if request.context.status == 'pending' and after_rectificationPeriod:
-                return 'edit_pendingAfterRectificationPeriod'
-            role = 'edit_{}'.format(request.context.status)
-        return role
+        request = self.__parent__.request
+        lot = request.context
+        rectification_ended = bool(
+            lot.status == 'pending' and
+            lot.rectificationPeriod and
+            lot.rectificationPeriod.endDate < get_now()
+        )
+        return lot_role_table.resolve(request.authenticated_role, (lot.status, rectification_ended))
 
     @serializable(serialize_when_none=False, type=IsoDateTimeType())
     def next_check(self):
@@ -259,24 +264,11 @@ class Lot(BaseLot):
         return min(checks) if checks else None
 
     def __acl__(self):
-        acl = [
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'edit_lot'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'upload_lot_documents'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'upload_lot_items'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'upload_lot_auctions'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'upload_lot_decisions'),
-            (Allow, 'g:concierge', 'upload_lot_auctions'),
-            (Allow, 'g:convoy', 'upload_lot_auctions'),
-            (Allow, 'g:convoy', 'upload_lot_contracts'),
-            (Allow, 'g:caravan', 'upload_lot_contracts'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'upload_lot_auction_documents'),
-
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'create_related_process'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'edit_related_process'),
-            (Allow, '{}_{}'.format(self.owner, self.owner_token), 'delete_related_process'),
-            (Allow, 'g:concierge', 'edit_related_process'),
-            (Allow, 'g:convoy', 'create_related_process'),
-            (Allow, 'g:convoy', 'edit_related_process'),
-            (Allow, 'g:convoy', 'delete_related_process'),
-        ]
-        return acl
+        owner = (self.owner, self.owner_token)
+        cached = getattr(self, '_acl', None)
+        if cached is None or cached[0] != owner:
+            principal = '{}_{}'.format(*owner)
+            acl = [(Allow, principal, permission) for permission in OWNER_PERMISSIONS]
+            acl.extend(GROUPS_ACL)
+            self._acl = (owner, acl)
+        return self._acl[1]
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Opt-in per-request profiling of loki views
+
+A request is profiled when ``profiling`` is set in the plugin config or when
+it's sent by an administrator with ``X-Loki-Profile: 1``. Wall time of validators, apply_patch,
+update_auctions, serialization and save_lot is summed per stage and kept in
+a bounded buffer, dumped to administrators by ``/lots/loki/profiles``.
+"""
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from timeit import default_timer
+
+from pyramid.settings import asbool
+from pyramid.threadlocal import get_current_request
+
+from openregistry.lots.core import utils as core_utils
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.constants import PROFILES_BUFFER_SIZE
+from openregistry.lots.loki.renderers import RENDERER_NAME
+from openregistry.lots.loki.traversal import INTERNALS_PERMISSION, InternalsRoot
+
+
+PROFILE_HEADER = 'X-Loki-Profile'
+PROFILE_ENVIRON_KEY = 'openregistry.lots.loki.profile'
+
+
+class RequestProfile(object):
+    """Wall time of request stages"""
+
+    def __init__(self, request):
+        self.date = get_now()
+        self.method = request.method
+        # without query, which may hold acc_token
+        self.path = request.path
+        self.stages = {}
+        self.active = set()
+
+    def as_dict(self, route, status, total):
+        return {
+            'date': self.date.isoformat(),
+            'route': route,
+            'method': self.method,
+            'path': self.path,
+            'status': status,
+            'total': total,
+            'stages': dict(self.stages),
+        }
+
+
+class ProfilesBuffer(object):
+    """Ring buffer of the latest profiles"""
+
+    def __init__(self, size=PROFILES_BUFFER_SIZE):
+        self._profiles = deque(maxlen=size)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def append(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def dump(self):
+        with self._lock:
+            return list(self._profiles)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfilesBuffer()
+
+
+def get_profile(request=None):
+    request = request or get_current_request()
+    if request is None:
+        return None
+    return request.environ.get(PROFILE_ENVIRON_KEY)
+
+
+@contextmanager
+def stage(name, profile=None):
+    """Add wall time of the block to stage `name` of the current request profile"""
+    profile = profile or get_profile()
+    # stages nested in a stage with the same name are counted once
+    if profile is None or name in profile.active:
+        yield
+        return
+    profile.active.add(name)
+    start = default_timer()
+    try:
+        yield
+    finally:
+        profile.stages[name] = profile.stages.get(name, 0) + default_timer() - start
+        profile.active.discard(name)
+
+
+def profiled(name):
+    """Decorate function to be timed as stage `name`"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = get_profile()
+            if profile is None:
+                return func(*args, **kwargs)
+            with stage(name, profile):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def json_view(**kwargs):
+    """core json_view rendered by loki renderer, with validators and the view itself timed"""
+    kwargs.setdefault('renderer', RENDERER_NAME)
+    if kwargs.get('validators'):
+        kwargs['validators'] = tuple(profiled('validators')(v) for v in kwargs['validators'])
+    decorator = core_utils.json_view(**kwargs)
+
+    def wrapper(method):
+        return decorator(profiled('view')(method))
+    return wrapper
+
+
+apply_patch = profiled('apply_patch')(core_utils.apply_patch)
+save_lot = profiled('save_lot')(core_utils.save_lot)
+
+
+def is_profiling_enabled(request):
+    if getattr(request.registry, 'loki_profiling', False):
+        return True
+    return bool(
+        asbool(request.headers.get(PROFILE_HEADER, False)) and
+        request.has_permission(INTERNALS_PERMISSION, InternalsRoot(request))
+    )
+
+
+def profiling_tween_factory(handler, registry):
+    """Tween starting a profile of requests to loki views if profiling is enabled"""
+    def profiling_tween(request):
+        if not is_profiling_enabled(request):
+            return handler(request)
+        profile = request.environ[PROFILE_ENVIRON_KEY] = RequestProfile(request)
+        start = default_timer()
+        status = 500
+        try:
+            response = handler(request)
+            status = response.status_code
+            return response
+        finally:
+            route = getattr(request, 'matched_route', None)
+            if route is not None and 'loki:' in route.name:
+                profiles.append(profile.as_dict(route.name, status, default_timer() - start))
+    return profiling_tween
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Default auctions, contract and documents of a new lot
+
+Every lot is created with the same three auctions, a contract and the
+platform legal details document. Models for them are converted by schematics
+once per model class and then cloned for every new lot. Fields with callable
+defaults (ids, dates) which are not set in prototype data get fresh values in
+every clone.
+"""
+from copy import deepcopy
+
+from six import iteritems
+from schematics.models import Model
+
+from openregistry.lots.loki.constants import (
+    CONTRACT_TYPE,
+    DEFAULT_DUTCH_STEPS,
+    PLATFORM_LEGAL_DETAILS_DOC_DATA
+)
+from openregistry.lots.loki.lazy import LazyListsMixin, LazyModelList
+
+DEFAULT_AUCTION_TYPES = ('sellout.english', 'sellout.english', 'sellout.insider')
+
+_prototypes = {}
+
+
+def _clone_value(value):
+    if isinstance(value, Model):
+        return clone_model(value)
+    elif isinstance(value, LazyModelList):
+        return LazyModelList(value.field, [_clone_value(i) for i in value], value.context)
+    elif isinstance(value, list):
+        return [_clone_value(i) for i in value]
+    elif isinstance(value, dict):
+        return dict((k, _clone_value(v)) for k, v in iteritems(value))
+    return value
+
+
+def clone_model(model):
+    """Copy of `model` without conversion, callable defaults are evaluated again"""
+    model_class = model.__class__
+    clone = model_class.__new__(model_class)
+    clone._initial = deepcopy(model._initial)
+    clone._data = dict((name, _clone_value(value)) for name, value in iteritems(model._data))
+    for name, field in iteritems(model_class._fields):
+        is_set = name in model._initial or (field.serialized_name or name) in model._initial
+        if callable(field._default) and not is_set:
+            clone._data[name] = field.to_native(field.default)
+    if isinstance(clone, LazyListsMixin):
+        clone._adopt_lazy_lists()
+    return clone
+
+
+def _get_prototypes(model_class, name, build):
+    key = (model_class, name)
+    if key not in _prototypes:
+        _prototypes[key] = tuple(model_class(data) for data in build())
+    return _prototypes[key]
+
+
+def _default_auctions_data():
+    for tenderAttempts, auction_type in enumerate(DEFAULT_AUCTION_TYPES, 1):
+        data = dict()
+        data['tenderAttempts'] = tenderAttempts
+        data['procurementMethodType'] = auction_type
+        data['status'] = 'scheduled'
+        data['auctionParameters'] = {}
+        if auction_type == 'sellout.english':
+            data['auctionParameters']['type'] = 'english'
+        elif auction_type == 'sellout.insider':
+            data['auctionParameters']['type'] = 'insider'
+            data['auctionParameters']['dutchSteps'] = DEFAULT_DUTCH_STEPS
+        yield data
+
+
+def create_default_auctions(auction_class):
+    return [clone_model(i) for i in _get_prototypes(auction_class, 'auctions', _default_auctions_data)]
+
+
+def create_default_contract(contract_class):
+    prototype, = _get_prototypes(contract_class, 'contract', lambda: [{'type': CONTRACT_TYPE}])
+    return clone_model(prototype)
+
+
+def create_platform_legal_details_document(document_class):
+    prototype, = _get_prototypes(document_class, 'platform_legal_details', lambda: [PLATFORM_LEGAL_DETAILS_DOC_DATA])
+    return clone_model(prototype)
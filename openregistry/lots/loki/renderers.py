@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""JSON renderer of loki views
+
+Serialized lots hold json types and Decimal amounts only, dates and
+durations are already exported as strings by IsoDateTimeType and
+IsoDurationType. Responses are encoded straight to bytes by simplejson,
+which core renders with, using its C speedups when they are built. Without
+simplejson the stdlib json (C accelerated as well) is used and Decimal is
+encoded as float.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from isodate import duration_isoformat
+
+try:
+    import simplejson as json
+    DUMPS_OPTIONS = {'use_decimal': True}
+    C_ACCELERATED = json._import_c_make_encoder() is not None
+except ImportError:
+    import json
+    DUMPS_OPTIONS = {}
+    C_ACCELERATED = json.encoder.c_make_encoder is not None
+
+
+RENDERER_NAME = 'loki_json'
+CONTENT_TYPE = 'application/json'
+
+
+def default(obj):
+    """Values of types which are not exported as json types by schematics"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return duration_isoformat(obj)
+    raise TypeError('{!r} is not JSON serializable'.format(obj))
+
+
+_encoder = json.JSONEncoder(default=default, **DUMPS_OPTIONS)
+
+
+def dumps(value):
+    """`value` encoded to json bytes, as by core renderer"""
+    return _encoder.encode(value)
+
+
+class JSONRenderer(object):
+    """Renderer of loki json views"""
+
+    def __init__(self, info):
+        pass
+
+    def __call__(self, value, system):
+        request = system.get('request')
+        if request is not None:
+            response = request.response
+            if response.content_type == response.default_content_type:
+                response.content_type = CONTENT_TYPE
+        return dumps(value)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from itertools import chain
 
 from schematics.transforms import blacklist, whitelist
 from openregistry.lots.core.models import (
@@ -9,6 +10,7 @@ from openregistry.lots.core.models import (
     schematics_default_role,
     lots_embedded_role
 )
+from openregistry.lots.loki.constants import LOT_STATUSES
 
 
 item_create_role = blacklist('id')
@@ -140,14 +142,86 @@ lot_roles = {
     'edit_active.contracting': whitelist(),
     # pending.sold role
     'pending.sold': view_role,
-    'edit.pending.sold': whitelist(),
+    'edit_pending.sold': whitelist(),
     # Sold role
     'sold': view_role,
-    'edit.sold': whitelist(),
+    'edit_sold': whitelist(),
     'invalid': view_role,
-    'edit.invalid': whitelist(),
+    'edit_invalid': whitelist(),
     'concierge': concierge_edit_role,
     'chronograph': whitelist(),
     'caravan': whitelist(),
     'convoy': whitelist()
 }
+
+
+class RoleTable(object):
+    """Role names of a model by authenticated role, then by state of edited object
+
+    None stands for a forbidden edit, it's never found in model roles.
+    """
+
+    def __init__(self, name, roles, by_authenticated_role, by_state=None, default=None):
+        self.name = name
+        self.roles = roles
+        self.by_authenticated_role = by_authenticated_role
+        self.by_state = by_state or {}
+        self.default = default
+
+    def resolve(self, authenticated_role, state=None):
+        if authenticated_role in self.by_authenticated_role:
+            return self.by_authenticated_role[authenticated_role]
+        return self.by_state.get(state, self.default)
+
+    def validate(self):
+        names = chain(self.by_authenticated_role.values(), self.by_state.values(), [self.default])
+        missing = sorted(set(name for name in names if name is not None and name not in self.roles))
+        if missing:
+            raise ValueError(u'{} roles are missing: {}'.format(self.name, ', '.join(missing)))
+
+
+# state is (status, whether rectificationPeriod is over)
+lot_role_table = RoleTable(
+    'Lot', lot_roles,
+    by_authenticated_role={
+        'Administrator': 'Administrator',
+        'concierge': 'concierge',
+        'convoy': 'convoy',
+        'chronograph': 'chronograph',
+        'caravan': 'caravan',
+    },
+    by_state=dict(
+        [((status, False), 'edit_{}'.format(status)) for status in LOT_STATUSES] +
+        [(('pending', True), 'edit_pendingAfterRectificationPeriod')]
+    )
+)
+
+# state is (tenderAttempts, procurementMethodType)
+auction_role_table = RoleTable(
+    'Auction', auction_roles,
+    by_authenticated_role={
+        'Administrator': None,
+        'convoy': 'convoy',
+        'concierge': 'concierge',
+    },
+    by_state={
+        (1, 'sellout.english'): 'edit_1.sellout.english',
+        (2, 'sellout.english'): 'edit_2.sellout.english',
+        (3, 'sellout.insider'): 'edit_3.sellout.insider',
+    }
+)
+
+contract_role_table = RoleTable(
+    'Contract', contracts_roles,
+    by_authenticated_role={
+        'caravan': 'caravan',
+        'convoy': 'convoy',
+    }
+)
+
+role_tables = (lot_role_table, auction_role_table, contract_role_table)
+
+
+def validate_role_tables():
+    for table in role_tables:
+        table.validate()
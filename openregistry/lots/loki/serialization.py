@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Compiled role transforms for loki models
+
+schematics resolves the role filter and walks every field (serializables
+included) on each ``serialize`` call. Here the list of fields exported by
+a (model class, role) pair is computed once and reused, so excluded fields
+are never touched. Output is the same as ``schematics.transforms.to_primitive``
+gives.
+"""
+from itertools import chain
+
+from six import iteritems
+from schematics.transforms import Role, allow_none, export_loop, to_primitive, wholelist
+from schematics.types.compound import ListType, ModelType
+
+from openregistry.lots.loki.lazy import LazyListType
+from openregistry.lots.loki.profiling import profiled
+
+
+COMPILABLE_ROLE_FUNCTIONS = (Role.wholelist, Role.whitelist, Role.blacklist)
+
+# (model class, role) -> tuple of (field name, serialized name, field, kind, allow none)
+# or None when the pair can't be compiled and has to be exported by schematics
+_plans = {}
+
+FIELD, MODEL, MODEL_LIST = range(3)
+
+
+def _get_role_filter(model_class, role):
+    roles = model_class._options.roles
+    if role in roles:
+        return roles[role]
+    return roles.get('default', wholelist())
+
+
+def _field_kind(field):
+    if type(field) is ModelType:
+        return MODEL
+    if type(field) in (ListType, LazyListType) and type(field.field) is ModelType:
+        return MODEL_LIST
+    return FIELD
+
+
+def compile_plan(model_class, role):
+    key = (model_class, role)
+    if key in _plans:
+        return _plans[key]
+
+    role_filter = _get_role_filter(model_class, role)
+    if role_filter.function not in COMPILABLE_ROLE_FUNCTIONS or getattr(model_class._options, 'fields_order', None):
+        plan = None
+    else:
+        plan = tuple(
+            (name, field.serialized_name or name, field, _field_kind(field), allow_none(model_class, field))
+            for name, field in chain(iteritems(model_class._fields), iteritems(model_class._serializables))
+            if not role_filter(name, None)
+        )
+    _plans[key] = plan
+    return plan
+
+
+def precompile(model_class, roles=None):
+    """Compile plans for `model_class` and all nested models reachable with the same roles"""
+    for role in roles or model_class._options.roles:
+        _precompile(model_class, role, set())
+
+
+def _precompile(model_class, role, seen):
+    if (model_class, role) in seen:
+        return
+    seen.add((model_class, role))
+    for _, _, field, kind, _ in compile_plan(model_class, role) or ():
+        if kind == MODEL:
+            _precompile(field.model_class, role, seen)
+        elif kind == MODEL_LIST:
+            _precompile(field.field.model_class, role, seen)
+
+
+def _export_model(field, value, role, converter):
+    model_class = value.__class__ if isinstance(value, field.model_class) else field.model_class
+    return _export(model_class, value, role, converter) or None
+
+
+def _shape(field, kind, value, role, converter):
+    if kind == MODEL:
+        return _export_model(field, value, role, converter)
+    elif kind == MODEL_LIST:
+        shaped = [
+            item for item in (_export_model(field.field, i, role, converter) for i in value)
+            if item is not None
+        ]
+        if not shaped and not field.allow_none():
+            return None
+        return shaped
+    elif hasattr(field, 'export_loop'):
+        return field.export_loop(value, converter, role=role)
+    return converter(field, value)
+
+
+def _export(model_class, instance, role, converter):
+    plan = compile_plan(model_class, role)
+    if plan is None:
+        return export_loop(model_class, instance, converter, role=role)
+
+    data = {}
+    for name, serialized_name, field, kind, none_allowed in plan:
+        value = instance[name]
+        if value is None:
+            if none_allowed:
+                data[serialized_name] = None
+            continue
+        shaped = _shape(field, kind, value, role, converter)
+        if shaped is not None or none_allowed:
+            data[serialized_name] = shaped
+    return data or None
+
+
+def _get_converter(context):
+    def converter(field, value):
+        return field.to_primitive(value, context=context)
+    return converter
+
+
+def serialize(instance, role=None, context=None):
+    model_class = instance.__class__
+    if role and role not in model_class._options.roles:
+        raise ValueError(u'%s Model has no role "%s"' % (model_class.__name__, role))
+    if compile_plan(model_class, role) is None:
+        return to_primitive(model_class, instance, role=role, context=context)
+    return _export(model_class, instance, role, _get_converter(context))
+
+
+class CompiledRolesMixin(object):
+    """Serialize model using compiled role plans"""
+
+    @profiled('serialize')
+    def serialize(self, role=None, context=None):
+        return serialize(self, role=role, context=context)
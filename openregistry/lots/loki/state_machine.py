@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Status transitions of loki lots compiled from STATUS_CHANGES
+
+Allowed transitions are kept as a set of (from, to, role) triples, side
+effects of a transition are hooks registered for (from, to, trigger), where
+trigger is the kind of request which caused the transition.
+"""
+from collections import defaultdict
+
+from openregistry.lots.core.utils import context_unpack, LOGGER
+
+from openregistry.lots.loki.constants import STATUS_CHANGES
+from openregistry.lots.loki.metrics import observe_transition
+
+
+LOT, AUCTION, CONTRACT, CHRONOGRAPH = 'lot', 'auction', 'contract', 'chronograph'
+TRIGGERS = (LOT, AUCTION, CONTRACT, CHRONOGRAPH)
+
+
+class StateMachine(object):
+    """Allowed status transitions with side effects run on each of them"""
+
+    def __init__(self, status_changes):
+        self.editors = {}
+        self.transitions = {}
+        for status, changes in status_changes.items():
+            self.editors[status] = frozenset(changes['editing_permissions'])
+            for next_status, roles in changes['next_status'].items():
+                self.transitions[(status, next_status)] = frozenset(roles)
+        self.allowed = frozenset(
+            (from_status, to_status, role)
+            for (from_status, to_status), roles in self.transitions.items()
+            for role in roles
+        )
+        self.hooks = defaultdict(list)
+
+    def can_edit(self, status, role):
+        return role in self.editors.get(status, ())
+
+    def is_allowed(self, from_status, to_status, role):
+        if from_status == to_status:
+            return self.can_edit(from_status, role)
+        return (from_status, to_status, role) in self.allowed
+
+    def next_statuses(self, status, role):
+        return sorted(
+            to_status for (from_status, to_status), roles in self.transitions.items()
+            if from_status == status and role in roles
+        )
+
+    def on(self, from_status, to_status, trigger):
+        """Register decorated function as a hook of transition caused by `trigger`"""
+        if (from_status, to_status) not in self.transitions:
+            raise ValueError(u'Unknown transition {} -> {}'.format(from_status, to_status))
+        if trigger not in TRIGGERS:
+            raise ValueError(u'Unknown trigger {}'.format(trigger))
+
+        def register(hook):
+            self.hooks[(from_status, to_status, trigger)].append(hook)
+            return hook
+        return register
+
+    def run_hooks(self, request, lot, from_status, to_status, trigger):
+        for hook in self.hooks.get((from_status, to_status, trigger), ()):
+            hook(request, lot)
+
+    def switch(self, request, lot, status, trigger):
+        """Move `lot` to `status` and run hooks of the transition"""
+        from_status = lot.status
+        if (from_status, status) not in self.transitions:
+            raise ValueError(u'Unknown transition {} -> {}'.format(from_status, status))
+        LOGGER.info('Switched lot %s to %s', lot.id, status,
+                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_{}'.format(status)}))
+        lot.status = status
+        observe_transition(request, lot, from_status, status, trigger)
+        self.run_hooks(request, lot, from_status, status, trigger)
+
+    def describe(self):
+        statuses = {}
+        for status, editors in self.editors.items():
+            statuses[status] = {'editing_permissions': sorted(editors), 'next_status': {}}
+        for (from_status, to_status), roles in self.transitions.items():
+            hooks = {}
+            for trigger in TRIGGERS:
+                names = [hook.__name__ for hook in self.hooks.get((from_status, to_status, trigger), ())]
+                if names:
+                    hooks[trigger] = names
+            statuses[from_status]['next_status'][to_status] = {'roles': sorted(roles), 'hooks': hooks}
+        return statuses
+
+
+lot_state_machine = StateMachine(STATUS_CHANGES)
+
+
+@lot_state_machine.on('pending.deleted', 'deleted', LOT)
+def cancel_auctions_and_contract(request, lot):
+    for auction in lot.auctions:
+        auction.status = 'cancelled'
+    lot.contracts[0].status = 'cancelled'
+
+
+@lot_state_machine.on('active.salable', 'composing', LOT)
+def reset_rectification_period(request, lot):
+    lot.rectificationPeriod = None
+
+
+@lot_state_machine.on('active.auction', 'pending.dissolution', AUCTION)
+def cancel_contract(request, lot):
+    lot.contracts[0].status = 'cancelled'
+
+
+@lot_state_machine.on('active.auction', 'pending.dissolution', AUCTION)
+@lot_state_machine.on('active.auction', 'active.contracting', AUCTION)
+def cancel_next_auctions(request, lot):
+    for auction in lot.auctions[request.validated['auction'].tenderAttempts:]:
+        auction.status = 'cancelled'
@@ -10,6 +10,9 @@ from openregistry.lots.loki.tests.base import (
 from openregistry.lots.loki.tests.json_data import test_lot_auctions_data
 from openregistry.lots.loki.tests.blanks.auction_blanks import (
     patch_english_auction,
+    patch_auctions_collection,
+    auctions_conditional_get,
+    auction_patch_profiling,
     patch_second_english_auction,
     patch_insider_auction,
     rectificationPeriod_auction_workflow,
@@ -18,7 +21,8 @@ from openregistry.lots.loki.tests.blanks.auction_blanks import (
     submissionMethodDetails_check,
     patch_auctions_with_lot,
     patch_auction_by_concierge,
-    auctionPeriod_endDate_blacklisted
+    auctionPeriod_endDate_blacklisted,
+    auctions_bulk_auctionPeriod_endDate_blacklisted
 )
 
 
@@ -28,6 +32,9 @@ class LotAuctionResourceTest(LotContentWebTest):
     test_patch_auctions_with_lot = snitch(patch_auctions_with_lot)
     test_patch_auction_by_concierge = snitch(patch_auction_by_concierge)
     test_patch_english_auction = snitch(patch_english_auction)
+    test_patch_auctions_collection = snitch(patch_auctions_collection)
+    test_auctions_conditional_get = snitch(auctions_conditional_get)
+    test_auction_patch_profiling = snitch(auction_patch_profiling)
     test_patch_second_english_auction = snitch(patch_second_english_auction)
     test_patch_insider_auction = snitch(patch_insider_auction)
     test_rectificationPeriod_auction_workflow = snitch(rectificationPeriod_auction_workflow)
@@ -35,6 +42,7 @@ class LotAuctionResourceTest(LotContentWebTest):
     test_procurementMethodDetails_check_without_sandbox = snitch(procurementMethodDetails_check_without_sandbox)
     submissionMethodDetails_check_without_sandbox = snitch(submissionMethodDetails_check)
     test_auctionPeriod_endDate_blacklisted = snitch(auctionPeriod_endDate_blacklisted)
+    test_auctions_bulk_auctionPeriod_endDate_blacklisted = snitch(auctions_bulk_auctionPeriod_endDate_blacklisted)
 
 
 def suite():
@@ -7,6 +7,7 @@ from openregistry.lots.loki.tests.blanks.auction_document_blanks import (
     not_found_auction_document,
     put_auction_document,
     create_auction_document,
+    auction_documents_versions_listing,
     patch_auction_document,
     model_validation,
     rectificationPeriod_document_workflow
@@ -28,6 +29,7 @@ class LotAuctionDocumentWithDSResourceTest(LotContentWebTest):
     test_put_auction_document = snitch(put_auction_document)
     test_create_auction_document = snitch(create_auction_document)
     test_patch_auction_document = snitch(patch_auction_document)
+    test_auction_documents_versions_listing = snitch(auction_documents_versions_listing)
     test_model_validation = snitch(model_validation)
     test_rectification_document_workflow = snitch(rectificationPeriod_document_workflow)
 
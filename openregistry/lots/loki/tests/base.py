@@ -14,8 +14,10 @@ from openregistry.lots.core.tests.base import (
     BaseLotWebTest as BaseLWT,
     MOCK_CONFIG as BASE_MOCK_CONFIG
 )
+from openregistry.lots.loki.models import Lot
 from openregistry.lots.loki.tests.json_data import (
     test_loki_lot_data,
+    test_loki_document_data,
     auction_english_data,
     auction_second_english_data,
     test_loki_item_data
@@ -33,6 +35,37 @@ def round_to_two_decimal_places(value):
     return float(Decimal(str(value)).quantize(prec, ROUND_HALF_UP).normalize())
 
 
+def create_lot_model(items_count=1, documents_count=1, status='pending'):
+    """Build loki Lot instance with three auctions, a contract and given number of items and documents"""
+    data = deepcopy(test_loki_lot_data)
+    data['id'] = uuid4().hex
+    data['status'] = status
+    data['items'] = []
+    for _ in range(items_count):
+        item = deepcopy(test_loki_item_data)
+        item['id'] = uuid4().hex
+        data['items'].append(item)
+    data['documents'] = []
+    for _ in range(documents_count):
+        document = deepcopy(test_loki_document_data)
+        document['id'] = uuid4().hex
+        document['dateModified'] = get_now().isoformat()
+        data['documents'].append(document)
+
+    auctions = [deepcopy(auction_english_data), deepcopy(auction_english_data), {}]
+    auction_types = ['sellout.english', 'sellout.english', 'sellout.insider']
+    for tenderAttempts, (auction, auction_type) in enumerate(zip(auctions, auction_types), 1):
+        auction['id'] = uuid4().hex
+        auction['tenderAttempts'] = tenderAttempts
+        auction['procurementMethodType'] = auction_type
+        auction['status'] = 'scheduled'
+        auction['auctionParameters'] = {'type': auction_type.split('.')[1]}
+    auctions[1].update(auction_second_english_data)
+    data['auctions'] = auctions
+    data['contracts'] = [{'id': uuid4().hex, 'type': 'yoke'}]
+    return Lot(data)
+
+
 def add_decisions(self, lot):
     asset_decision = {
             'decisionDate': get_now().isoformat(),
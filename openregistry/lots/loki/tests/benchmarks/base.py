@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+
+from timeit import default_timer
+
+
+def measure(func, repeat=1):
+    """Call `func` `repeat` times and return list of wall times in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        timings.append(default_timer() - start)
+    return timings
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    index = int(round(percent / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(timings):
+    return {
+        'runs': len(timings),
+        'min': min(timings),
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'max': max(timings),
+    }
+
+
+def report(name, results, stream=sys.stdout):
+    json.dump({'benchmark': name, 'results': results}, stream, indent=2, sort_keys=True)
+    stream.write('\n')
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Memoized business dates against core calculate_business_date
+
+Calculates working-day dates for a number of distinct start dates, each
+`--calls` times, as validation of auctionPeriod does for every auction of a
+lot, with the cached and the uncached function.
+
+    python -m openregistry.lots.loki.tests.benchmarks.business_date
+"""
+import argparse
+
+from datetime import timedelta
+
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.business_date import (
+    calculate_business_date,
+    calculate_business_date_uncached,
+    _cache
+)
+from openregistry.lots.loki.constants import DAYS_AFTER_RECTIFICATION_PERIOD, RECTIFICATION_PERIOD_DURATION
+from openregistry.lots.loki.tests.base import create_lot_model
+from openregistry.lots.loki.tests.benchmarks.base import measure, summarize, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--starts', type=int, default=100)
+    parser.add_argument('--calls', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    lot = create_lot_model()
+    now = get_now()
+    starts = [now + timedelta(hours=7 * i) for i in range(args.starts)]
+    deltas = (DAYS_AFTER_RECTIFICATION_PERIOD, DAYS_AFTER_RECTIFICATION_PERIOD + RECTIFICATION_PERIOD_DURATION)
+
+    def run(func):
+        for start in starts:
+            for delta in deltas:
+                for _ in range(args.calls):
+                    func(start=start, delta=delta, context=lot, working_days=True)
+
+    for start in starts:
+        for delta in deltas:
+            assert calculate_business_date(start, delta, context=lot, working_days=True) == \
+                calculate_business_date_uncached(start=start, delta=delta, context=lot, working_days=True)
+
+    def cold_cached():
+        _cache.clear()
+        run(calculate_business_date)
+
+    uncached = summarize(measure(lambda: run(calculate_business_date_uncached), args.repeat))
+    cached = summarize(measure(cold_cached, args.repeat))
+    report('business_date', {
+        'starts': args.starts,
+        'calls': args.calls,
+        'uncached': uncached,
+        'cached': cached,
+        'speedup': uncached['p50'] / cached['p50'],
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Scheduler lag of the loki/by_next_check view
+
+Fills a temporary couchdb database with pending lots spread over two days
+of next_check values (and the same amount of lots without next_check),
+then measures how long the chronograph needs to collect every due lot at
+several cutoffs: through the by_next_check view and through a full
+_all_docs scan, which is what the scheduler had to do without the view.
+
+    python -m openregistry.lots.loki.tests.benchmarks.due_feed --couchdb-url http://127.0.0.1:5984
+"""
+import argparse
+
+from datetime import timedelta
+from uuid import uuid4
+
+from couchdb import Server
+
+from openregistry.lots.core.constants import TZ
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.constants import DUE_LOTS_FEED_MAX_LIMIT
+from openregistry.lots.loki.design import sync_design
+from openregistry.lots.loki.utils import get_due_lots
+from openregistry.lots.loki.tests.benchmarks.base import measure, summarize, report
+
+WINDOW = timedelta(days=2)
+CUTOFFS = (0.01, 0.25, 0.5, 1)
+INSERT_CHUNK = 1000
+
+
+def fill_db(db, lots_count, start):
+    step = WINDOW.total_seconds() / lots_count
+    for chunk_start in range(0, lots_count, INSERT_CHUNK):
+        docs = []
+        for i in range(chunk_start, min(chunk_start + INSERT_CHUNK, lots_count)):
+            next_check = start + timedelta(seconds=step * i)
+            docs.append({
+                '_id': uuid4().hex, 'doc_type': 'Lot', 'lotType': 'loki',
+                'status': 'pending', 'next_check': next_check.isoformat()
+            })
+            docs.append({
+                '_id': uuid4().hex, 'doc_type': 'Lot', 'lotType': 'loki', 'status': 'active.salable'
+            })
+        db.update(docs)
+
+
+def collect_with_view(db, until, page_size):
+    lots, startkey = [], None
+    while True:
+        rows = get_due_lots(db, until, startkey, limit=page_size, skip=1, include_docs=False)
+        lots.extend(row.id for row in rows)
+        if len(rows) < page_size:
+            return lots
+        startkey = rows[-1].key
+
+
+def collect_with_scan(db, until, page_size):
+    until = until.isoformat()
+    lots, startkey = [], None
+    while True:
+        options = {'include_docs': True, 'limit': page_size}
+        if startkey:
+            options.update(startkey=startkey, skip=1)
+        rows = db.view('_all_docs', **options).rows
+        lots.extend(
+            row.id for row in rows
+            if row.doc.get('doc_type') == 'Lot' and row.doc.get('next_check') and row.doc['next_check'] <= until
+        )
+        if len(rows) < page_size:
+            return lots
+        startkey = rows[-1].key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--couchdb-url', default='http://127.0.0.1:5984')
+    parser.add_argument('--lots', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=DUE_LOTS_FEED_MAX_LIMIT)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    server = Server(args.couchdb_url)
+    db = server.create('loki_bench_{}'.format(uuid4().hex))
+    try:
+        start = get_now().astimezone(TZ)
+        fill_db(db, args.lots, start)
+        sync_design(db, ['loki'])
+        results = {'lots': args.lots, 'page_size': args.page_size}
+        results['index_build'] = measure(lambda: get_due_lots(db, start, limit=1))[0]
+        for cutoff in CUTOFFS:
+            until = start + timedelta(seconds=WINDOW.total_seconds() * cutoff)
+            due = len(collect_with_view(db, until, args.page_size))
+            results['cutoff_{}'.format(cutoff)] = {
+                'due_lots': due,
+                'view': summarize(measure(lambda: collect_with_view(db, until, args.page_size), args.repeat)),
+                'scan': summarize(measure(lambda: collect_with_scan(db, until, args.page_size), args.repeat)),
+            }
+        report('due_feed', results)
+    finally:
+        del server[db.name]
+
+
+if __name__ == '__main__':
+    main()
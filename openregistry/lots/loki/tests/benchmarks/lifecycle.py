@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Full lifecycle of loki lots driven by concurrent brokers and bridges
+
+Every worker thread takes lots one by one through draft -> composing ->
+verification -> pending -> active.salable -> active.auction ->
+active.contracting -> pending.sold -> sold with the roles which do it in
+production: broker, concierge, chronograph, convoy and caravan. The app and
+database are the ones of ``BaseLotWebTest``. Latency percentiles are
+reported per endpoint and written to ``--output``.
+
+    python -m openregistry.lots.loki.tests.benchmarks.lifecycle --lots 100 --workers 8 --output lifecycle.json
+"""
+import argparse
+import re
+import threading
+
+from collections import defaultdict
+from copy import deepcopy
+from datetime import timedelta
+from timeit import default_timer
+
+from webtest import TestApp
+
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.tests.base import BaseLotWebTest
+from openregistry.lots.loki.tests.json_data import (
+    auction_english_data,
+    auction_second_english_data,
+    test_loki_item_data
+)
+from openregistry.lots.loki.tests.benchmarks.base import summarize, report
+
+ID_RE = re.compile(r'/[0-9a-f]{32}')
+
+
+class LifecycleError(Exception):
+    pass
+
+
+class Client(object):
+    """Test app of a single worker, timing each request by endpoint"""
+
+    def __init__(self, app, request_class, timings):
+        self.app = TestApp(app)
+        self.app.RequestClass = request_class
+        self.timings = timings
+
+    def request(self, role, method, path, data=None, headers=None):
+        self.app.authorization = ('Basic', (role, ''))
+        endpoint = '{} {}'.format(method.upper(), ID_RE.sub('/{id}', path))
+        start = default_timer()
+        if data is None:
+            response = self.app.get(path, headers=headers, expect_errors=True)
+        else:
+            response = getattr(self.app, method + '_json')(path, {'data': data}, headers=headers, expect_errors=True)
+        self.timings[endpoint].append(default_timer() - start)
+        if response.status_int >= 400:
+            raise LifecycleError('{} by {}: {} {}'.format(endpoint, role, response.status, response.body))
+        return response.json
+
+
+def run_lifecycle(client, db, initial_data):
+    result = client.request('broker', 'post', '/', deepcopy(initial_data))
+    lot_id, owner = result['data']['id'], {'X-Access-Token': str(result['access']['token'])}
+    lot_path = '/{}'.format(lot_id)
+
+    client.request('broker', 'patch', lot_path, {'status': 'composing'}, owner)
+    client.request('broker', 'post', lot_path + '/decisions', {
+        'decisionDate': get_now().isoformat(), 'decisionID': 'decisionLotID'
+    }, owner)
+    client.request('broker', 'post', lot_path + '/related_processes', {'relatedProcessID': '2' * 32}, owner)
+    auctions = sorted(client.request('broker', 'get', lot_path + '/auctions')['data'], key=lambda a: a['tenderAttempts'])
+    for auction, auction_data in zip(auctions, (auction_english_data, auction_second_english_data)):
+        client.request('broker', 'patch', '{}/auctions/{}'.format(lot_path, auction['id']), auction_data, owner)
+    client.request('broker', 'patch', lot_path, {'status': 'verification'}, owner)
+
+    lot = client.request('concierge', 'get', lot_path)['data']
+    client.request('concierge', 'patch', lot_path, {'decisions': [lot['decisions'][0], {
+        'decisionDate': get_now().isoformat(), 'decisionID': 'decisionAssetID',
+        'decisionOf': 'asset', 'relatedItem': '1' * 32
+    }]})
+    client.request('concierge', 'patch', lot_path, {'status': 'pending', 'items': [test_loki_item_data]})
+
+    # rectificationPeriod can't pass in a benchmark, it ends in the database
+    doc = Lot(db.get(lot_id))
+    doc.rectificationPeriod.endDate = get_now() - timedelta(seconds=1)
+    doc.store(db)
+    client.request('chronograph', 'patch', lot_path, {'status': 'active.salable'})
+
+    english = '{}/auctions/{}'.format(lot_path, auctions[0]['id'])
+    client.request('concierge', 'patch', english, {'status': 'active'})
+    client.request('convoy', 'patch', english, {'status': 'complete'})
+    contract = client.request('caravan', 'get', lot_path + '/contracts')['data'][0]
+    client.request('caravan', 'patch', '{}/contracts/{}'.format(lot_path, contract['id']), {'status': 'complete'})
+    client.request('concierge', 'patch', lot_path, {'status': 'sold'})
+
+    status = client.request('broker', 'get', lot_path)['data']['status']
+    if status != 'sold':
+        raise LifecycleError('Lot {} ended in {}'.format(lot_id, status))
+
+
+def worker(client, db, initial_data, lots, errors):
+    for _ in range(lots):
+        try:
+            run_lifecycle(client, db, initial_data)
+        except LifecycleError as e:
+            errors.append(str(e))
+
+
+class LifecycleBenchmark(BaseLotWebTest):
+    """App and database of web tests, set up by main"""
+    # not a test, though collected with all-modules
+    __test__ = False
+    docservice = True
+    lot_model = Lot
+
+    def runTest(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--lots', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--output', default='lifecycle.json')
+    args = parser.parse_args()
+
+    benchmark = LifecycleBenchmark()
+    benchmark.setUp()
+    try:
+        threads, clients, errors = [], [], []
+        for i in range(args.workers):
+            client = Client(benchmark.app.app, benchmark.app.RequestClass, defaultdict(list))
+            clients.append(client)
+            lots = args.lots // args.workers + (1 if i < args.lots % args.workers else 0)
+            threads.append(threading.Thread(
+                target=worker, args=(client, benchmark.db, benchmark.initial_data, lots, errors)
+            ))
+
+        start = default_timer()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = default_timer() - start
+    finally:
+        benchmark.tearDown()
+
+    timings = defaultdict(list)
+    for client in clients:
+        for endpoint, values in client.timings.items():
+            timings[endpoint].extend(values)
+    results = {
+        'lots': args.lots,
+        'workers': args.workers,
+        'duration': duration,
+        'lots_per_second': (args.lots - len(errors)) / duration,
+        'errors': errors,
+        'endpoints': dict((endpoint, summarize(values)) for endpoint, values in timings.items()),
+    }
+    with open(args.output, 'w') as output:
+        report('lifecycle', results, stream=output)
+    report('lifecycle', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks of loki model construction and serialization
+
+Times hot pure-Python paths one by one: Lot and Auction construction,
+Lot serialization with the view, plain and listing roles, json encoding of
+a serialized Lot, update_auctions, get_auction_validation_result and
+Lot.__acl__. With ``--baseline`` each case
+is compared to an earlier ``--output`` and the command exits with status 1
+when a case is more than ``--threshold`` slower.
+
+    python -m openregistry.lots.loki.tests.benchmarks.models --output models.json
+    python -m openregistry.lots.loki.tests.benchmarks.models --baseline models.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+
+from copy import deepcopy
+
+from openregistry.lots.loki.models import Auction, Lot
+from openregistry.lots.loki.renderers import dumps
+from openregistry.lots.loki.serialization import precompile
+from openregistry.lots.loki.utils import update_auctions
+from openregistry.lots.loki.validation import get_auction_validation_result
+from openregistry.lots.loki.tests.base import create_lot_model
+from openregistry.lots.loki.tests.json_data import auction_english_data, test_loki_lot_data
+from openregistry.lots.loki.tests.benchmarks.base import measure, summarize, report
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def get_cases(items, documents):
+    lot = create_lot_model(items_count=items, documents_count=documents)
+    lot.owner, lot.owner_token = 'broker', 'token'
+    lot_data = lot.serialize('plain')
+    auctions = sorted(lot.auctions, key=lambda a: a.tenderAttempts)
+    auction_data = deepcopy(auction_english_data)
+    auction_data.update({'tenderAttempts': 1, 'procurementMethodType': 'sellout.english'})
+    precompile(Lot)
+
+    def acl_uncached():
+        lot._acl = None
+        lot.__acl__()
+
+    return {
+        'lot_init_minimal': lambda: Lot(test_loki_lot_data),
+        'lot_init_full': lambda: Lot(lot_data),
+        'lot_serialize_view': lambda: lot.serialize('view'),
+        'lot_serialize_plain': lambda: lot.serialize('plain'),
+        'lot_serialize_listing': lambda: lot.serialize('listing'),
+        'lot_dumps': lambda: dumps({'data': lot_data}),
+        'auction_init': lambda: Auction(auction_data),
+        'update_auctions': lambda: update_auctions(lot),
+        'auction_validation_result': lambda: get_auction_validation_result(auctions),
+        'lot_acl': lot.__acl__,
+        'lot_acl_uncached': acl_uncached,
+    }
+
+
+def run_case(func, number, repeat):
+    def batch():
+        for _ in range(number):
+            func()
+    # per call timings
+    return summarize([timing / number for timing in measure(batch, repeat)])
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['p50'] / baseline[name]['p50']
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--items', type=int, default=10)
+    parser.add_argument('--documents', type=int, default=10)
+    parser.add_argument('--number', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--case', action='append', help='run only given cases')
+    parser.add_argument('--output', help='file to write results to, usable as a baseline')
+    parser.add_argument('--baseline', help='results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed relative slowdown of p50 against the baseline')
+    args = parser.parse_args()
+
+    cases = get_cases(args.items, args.documents)
+    names = args.case or sorted(cases)
+    results = dict((name, run_case(cases[name], args.number, args.repeat)) for name in names)
+
+    regressions = {}
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = find_regressions(results, json.load(baseline)['results']['cases'], args.threshold)
+
+    output = {
+        'items': args.items,
+        'documents': args.documents,
+        'threshold': args.threshold,
+        'cases': results,
+        'regressions': regressions,
+    }
+    if args.output:
+        with open(args.output, 'w') as stream:
+            report('models', output, stream=stream)
+    report('models', output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
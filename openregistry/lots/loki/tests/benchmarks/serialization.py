@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Compiled role transforms against schematics serialization
+
+Serializes a lot with 3 auctions, 100 items and 200 documents with the
+compiled plans (``Lot.serialize``) and with plain schematics
+``to_primitive``.
+
+    python -m openregistry.lots.loki.tests.benchmarks.serialization
+"""
+import argparse
+
+from schematics.transforms import to_primitive
+
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.serialization import precompile
+from openregistry.lots.loki.tests.base import create_lot_model
+from openregistry.lots.loki.tests.benchmarks.base import measure, summarize, report
+
+ROLES = ('view', 'plain', 'listing')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--items', type=int, default=100)
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    lot = create_lot_model(items_count=args.items, documents_count=args.documents)
+    precompile(Lot)
+    results = {'items': args.items, 'documents': args.documents}
+    for role in ROLES:
+        assert lot.serialize(role) == to_primitive(Lot, lot, role=role)
+        compiled = summarize(measure(lambda: lot.serialize(role), args.repeat))
+        schematics = summarize(measure(lambda: to_primitive(Lot, lot, role=role), args.repeat))
+        results[role] = {
+            'compiled': compiled,
+            'schematics': schematics,
+            'speedup': schematics['p50'] / compiled['p50'],
+        }
+    report('serialization', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Status transition checks of the compiled state machine against STATUS_CHANGES
+
+Checks a fixed random sample of (from, to, role) triples, as status change
+validation does on every lot PATCH, with ``lot_state_machine.is_allowed``
+and with lookups in the nested ``STATUS_CHANGES`` dict.
+
+    python -m openregistry.lots.loki.tests.benchmarks.status_transitions
+"""
+import argparse
+import random
+
+from openregistry.lots.loki.constants import STATUS_CHANGES
+from openregistry.lots.loki.state_machine import lot_state_machine
+from openregistry.lots.loki.tests.benchmarks.base import measure, summarize, report
+
+ROLES = ('lot_owner', 'Administrator', 'concierge', 'convoy', 'chronograph', 'caravan')
+
+
+def is_allowed_by_dict(from_status, to_status, role):
+    changes = STATUS_CHANGES[from_status]
+    if from_status == to_status:
+        return role in changes['editing_permissions']
+    return role in changes['next_status'].get(to_status, [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--checks', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    statuses = sorted(STATUS_CHANGES)
+    triples = [(rand.choice(statuses), rand.choice(statuses), rand.choice(ROLES)) for _ in range(args.checks)]
+    for triple in triples:
+        assert lot_state_machine.is_allowed(*triple) == is_allowed_by_dict(*triple)
+
+    def run(func):
+        for from_status, to_status, role in triples:
+            func(from_status, to_status, role)
+
+    compiled = summarize(measure(lambda: run(lot_state_machine.is_allowed), args.repeat))
+    nested = summarize(measure(lambda: run(is_allowed_by_dict), args.repeat))
+    report('status_transitions', {
+        'checks': args.checks,
+        'compiled': compiled,
+        'status_changes': nested,
+        'compiled_checks_per_second': args.checks / compiled['p50'],
+        'speedup': nested['p50'] / compiled['p50'],
+    })
+
+
+if __name__ == '__main__':
+    main()
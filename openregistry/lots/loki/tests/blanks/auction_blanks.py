@@ -11,6 +11,7 @@ from openregistry.lots.core.utils import (
 )
 from openregistry.lots.core.models import Period
 from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.profiling import profiles
 from openregistry.lots.core.constants import SANDBOX_MODE, TZ
 from openregistry.lots.loki.constants import (
     DEFAULT_DUTCH_STEPS,
@@ -290,6 +291,142 @@ def patch_english_auction(self):
     self.assertEqual(response.json['data']['auctionParameters']['type'], default_type)
 
 
+def patch_auctions_collection(self):
+    self.set_status('composing')
+    data = deepcopy(self.initial_auctions_data)
+    response = self.app.get('/{}/auctions'.format(self.resource_id))
+    english, second_english, insider = sorted(response.json['data'], key=lambda a: a['tenderAttempts'])
+    revisions = len(self.db.get(self.resource_id)['revisions'])
+
+    english_data = dict(data['english'], id=english['id'])
+    second_english_data = dict(data['second.english'], id=second_english['id'], value={'amount': 1})
+    response = self.app.patch_json(
+        '/{}/auctions'.format(self.resource_id),
+        headers=self.access_header,
+        params={'data': [english_data, second_english_data]}
+    )
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(response.content_type, 'application/json')
+    auctions = dict((a['id'], a) for a in response.json['data'])
+    self.assertEqual(auctions[english['id']]['value'], data['english']['value'])
+    self.assertEqual(auctions[second_english['id']]['tenderingDuration'], data['second.english']['tenderingDuration'])
+    self.assertEqual(auctions[insider['id']]['tenderingDuration'], data['second.english']['tenderingDuration'])
+    # value of second english auction isn't editable and is half of english one
+    self.assertEqual(auctions[second_english['id']]['value']['amount'],
+                     round_to_two_decimal_places(data['english']['value']['amount'] / 2))
+    self.assertEqual(len(self.db.get(self.resource_id)['revisions']), revisions + 1)
+
+    response = self.app.get('/{}/auctions/{}'.format(self.resource_id, second_english['id']))
+    self.assertEqual(response.json['data']['tenderingDuration'], data['second.english']['tenderingDuration'])
+
+    # Invalid changes
+    for params, name in (
+        ({'data': {'id': english['id']}}, 'data'),
+        ({'data': [{'id': english['id']}, {'id': english['id']}]}, 'id'),
+        ({'data': [{'id': 'some_id'}]}, 'id'),
+        ({'data': [dict(data['english'], id=english['id'], auctionPeriod={'startDate': 'date'})]}, 'auctionPeriod'),
+    ):
+        response = self.app.patch_json(
+            '/{}/auctions'.format(self.resource_id), headers=self.access_header, params=params, status=422
+        )
+        self.assertEqual(response.json['errors'][0]['name'], name)
+
+    response = self.app.patch_json(
+        '/{}/auctions'.format(self.resource_id),
+        params={'data': [english_data]},
+        headers={'X-Access-Token': 'some_token'},
+        status=403
+    )
+    self.assertEqual(response.status, '403 Forbidden')
+
+
+def auctions_conditional_get(self):
+    self.set_status('composing')
+    response = self.app.get('/{}/auctions'.format(self.resource_id))
+    english = sorted(response.json['data'], key=lambda a: a['tenderAttempts'])[0]
+
+    for path in ('/{}/auctions'.format(self.resource_id), '/{}/auctions/{}'.format(self.resource_id, english['id'])):
+        response = self.app.get(path)
+        etag = response.headers['ETag']
+        response = self.app.get(path, headers={'If-None-Match': etag}, status=304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.body, '')
+        response = self.app.get(path, headers={'If-None-Match': '"other"'})
+        self.assertEqual(response.status, '200 OK')
+        self.assertEqual(response.headers['ETag'], etag)
+
+    path = '/{}/auctions/{}'.format(self.resource_id, english['id'])
+    response = self.app.get(path)
+    etag = response.headers['ETag']
+    self.assertNotEqual(self.app.get(path + '?opt_pretty=1').headers['ETag'], etag)
+
+    data = deepcopy(self.initial_auctions_data)
+    response = self.app.patch_json(path, headers=self.access_header, params={'data': data['english']})
+    self.assertEqual(response.status, '200 OK')
+    response = self.app.get(path, headers={'If-None-Match': etag})
+    self.assertEqual(response.status, '200 OK')
+    self.assertNotEqual(response.headers['ETag'], etag)
+
+
+def auction_patch_profiling(self):
+    profiles.clear()
+    self.set_status('composing')
+    response = self.app.get('/{}/auctions'.format(self.resource_id))
+    english = sorted(response.json['data'], key=lambda a: a['tenderAttempts'])[0]
+    path = '/{}/auctions/{}'.format(self.resource_id, english['id'])
+    data = deepcopy(self.initial_auctions_data)
+    broker_authorization = self.app.authorization
+
+    # profiles are dumped to administrators only
+    self.app.authorization = None
+    response = self.app.get('/loki/profiles', status=403)
+    self.assertEqual(response.status, '403 Forbidden')
+    self.app.authorization = broker_authorization
+    self.app.get('/loki/profiles', status=403)
+
+    # profiling header is ignored unless sent by an administrator
+    headers = dict(self.access_header, **{'X-Loki-Profile': '1'})
+    response = self.app.patch_json(path, headers=headers, params={'data': data['english']})
+    self.assertEqual(response.status, '200 OK')
+    self.app.authorization = ('Basic', ('administrator', ''))
+    self.assertEqual(self.app.get('/loki/profiles').json['data'], [])
+
+    response = self.app.get(path, headers={'X-Loki-Profile': '1'})
+    self.assertEqual(response.status, '200 OK')
+    profile, = self.app.get('/loki/profiles').json['data']
+    self.assertEqual(profile['route'], 'loki:Lot Auctions')
+    self.assertEqual(profile['method'], 'GET')
+    profiles.clear()
+
+    self.app.app.registry.loki_profiling = True
+    try:
+        self.app.authorization = broker_authorization
+        response = self.app.patch_json(
+            '{}?acc_token={}'.format(path, self.access_header['X-Access-Token']),
+            params={'data': data['english']}
+        )
+        self.assertEqual(response.status, '200 OK')
+    finally:
+        self.app.app.registry.loki_profiling = False
+
+    self.app.authorization = ('Basic', ('administrator', ''))
+    profile, = self.app.get('/loki/profiles').json['data']
+    self.assertEqual(profile['route'], 'loki:Lot Auctions')
+    self.assertEqual(profile['method'], 'PATCH')
+    # query with acc_token isn't kept
+    self.assertEqual(profile['path'], path)
+    self.assertEqual(profile['status'], 200)
+    self.assertEqual(
+        set(profile['stages']),
+        {'validators', 'view', 'apply_patch', 'update_auctions', 'serialize', 'save_lot'}
+    )
+    for name in ('validators', 'view'):
+        self.assertLessEqual(profile['stages'][name], profile['total'])
+    for name in ('apply_patch', 'update_auctions', 'save_lot'):
+        self.assertLessEqual(profile['stages'][name], profile['stages']['view'])
+    self.app.authorization = broker_authorization
+
+
 def patch_second_english_auction(self):
     response = self.app.get('/{}'.format(self.resource_id))
     lot = response.json['data']
@@ -718,3 +855,39 @@ def auctionPeriod_endDate_blacklisted(self):
         data['auctionPeriod']['startDate']
     )
     self.assertNotIn('endDate', response.json['data']['auctionPeriod'])
+
+
+def auctions_bulk_auctionPeriod_endDate_blacklisted(self):
+    response = self.app.get('/{}/auctions'.format(self.resource_id))
+    auctions = sorted(response.json['data'], key=lambda a: a['tenderAttempts'])
+
+    response = self.app.get('/{}'.format(self.resource_id))
+    lot = response.json['data']
+    self.set_status('draft')
+    add_auctions(self, lot, access_header=self.access_header)
+    self.set_status('pending')
+
+    english = auctions[0]
+
+    # Change auctionPeriod of several auctions at once
+    data = {
+        'id': english['id'],
+        'auctionPeriod': {
+            'startDate': (datetime.now(TZ) + timedelta(1)).isoformat(),
+            'endDate': (datetime.now(TZ) + timedelta(10)).isoformat()
+        }
+    }
+
+    response = self.app.patch_json('/{}/auctions'.format(self.resource_id),
+        headers=self.access_header, params={
+            'data': [data]
+            })
+    self.assertEqual(response.status, '200 OK')
+    english = [a for a in response.json['data'] if a['id'] == english['id']][0]
+    self.assertEqual(
+        english['auctionPeriod']['startDate'],
+        data['auctionPeriod']['startDate']
+    )
+    self.assertNotIn('endDate', english['auctionPeriod'])
+    auction = [a for a in self.db.get(self.resource_id)['auctions'] if a['id'] == english['id']][0]
+    self.assertNotIn('endDate', auction['auctionPeriod'])
@@ -235,6 +235,41 @@ def put_auction_document(self):
     # self.assertEqual(response.body, 'content3')
 
 
+def auction_documents_versions_listing(self):
+    response = self.app.get('/{}/auctions'.format(self.resource_id))
+    auction_id = response.json["data"][0]['id']
+
+    response = self.app.post_json('/{}/auctions/{}/documents'.format(
+        self.resource_id, auction_id),
+        params={'data': self.initial_document_data},
+        headers=self.access_header,
+    )
+    self.assertEqual(response.status, '201 Created')
+    doc_id = response.json["data"]['id']
+
+    new_version_data = deepcopy(self.initial_document_data)
+    new_version_data['title'] = u'second_version.doc'
+    new_version_data['url'] = self.generate_docservice_url()
+    response = self.app.put_json(
+        '/{}/auctions/{}/documents/{}'.format(self.resource_id, auction_id, doc_id),
+        params={'data': new_version_data},
+        headers=self.access_header
+    )
+    self.assertEqual(response.status, '200 OK')
+
+    # only the latest version is listed by default
+    response = self.app.get('/{}/auctions/{}/documents'.format(self.resource_id, auction_id))
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual([(d['id'], d['title']) for d in response.json["data"]], [(doc_id, u'second_version.doc')])
+
+    response = self.app.get('/{}/auctions/{}/documents?all=1'.format(self.resource_id, auction_id))
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(
+        [(d['id'], d['title']) for d in response.json["data"]],
+        [(doc_id, self.initial_document_data['title']), (doc_id, u'second_version.doc')]
+    )
+
+
 def patch_auction_document(self):
     response = self.app.get('/{}/auctions'.format(self.resource_id))
     self.assertEqual(response.status, '200 OK')
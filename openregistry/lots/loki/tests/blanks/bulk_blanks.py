@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+
+
+def bulk_create_lots(self):
+    self.app.authorization = ('Basic', ('broker', ''))
+    lots_data = [deepcopy(self.initial_data) for _ in range(3)]
+    lots_data[1]['status'] = 'unknown'
+
+    response = self.app.post_json('/loki/bulk', {'data': lots_data})
+    self.assertEqual(response.status, '201 Created')
+    self.assertEqual(response.content_type, 'application/json')
+    results = response.json['data']
+    self.assertEqual(len(results), 3)
+    self.assertIn('errors', results[1])
+    self.assertNotIn('data', results[1])
+
+    for result in (results[0], results[2]):
+        lot = result['data']
+        self.assertEqual(lot['title'], self.initial_data['title'])
+        self.assertEqual(len(lot['auctions']), 3)
+        self.assertEqual(len(lot['contracts']), 1)
+        self.assertEqual(lot['documents'][0]['documentType'], 'x_PlatformLegalDetails')
+
+        response = self.app.get('/{}'.format(lot['id']))
+        self.assertEqual(response.json['data']['lotID'], lot['lotID'])
+        self.assertEqual(len(response.json['data']['auctions']), 3)
+
+        response = self.app.patch_json(
+            '/{}'.format(lot['id']),
+            params={'data': {'title': u'Новий лот'}},
+            headers={'X-Access-Token': str(result['access']['token'])}
+        )
+        self.assertEqual(response.json['data']['title'], u'Новий лот')
+    self.assertNotEqual(results[0]['data']['lotID'], results[2]['data']['lotID'])
+
+
+def bulk_create_lots_invalid(self):
+    self.app.authorization = ('Basic', ('broker', ''))
+    for data in ({}, [], ['lot'], {'title': 'lot'}):
+        response = self.app.post_json('/loki/bulk', {'data': data}, status=422)
+        self.assertEqual(response.json['errors'][0]['name'], 'data')
+
+    response = self.app.post_json('/loki/bulk', {'data': [{'status': 'unknown'}]}, status=422)
+    self.assertEqual(response.json['data'][0]['errors'][0]['name'], 'status')
+
+    lot_data = deepcopy(self.initial_data)
+    lot_data['lotType'] = 'unknown'
+    response = self.app.post_json('/loki/bulk', {'data': [lot_data]}, status=422)
+    self.assertEqual(response.json['data'][0]['errors'][0]['name'], 'data')
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+import mock
+
+from openregistry.lots.core.utils import get_now, calculate_business_date
+from openregistry.lots.core.models import Period
+
+from openregistry.lots.loki.tests.base import (
+    create_single_lot,
+    add_auctions
+)
+
+
+def create_pending_lot(self, rectificationPeriod):
+    response = create_single_lot(self, self.initial_data)
+    lot = response.json['data']
+    access_header = {'X-Access-Token': str(response.json['access']['token'])}
+    add_auctions(self, lot, access_header)
+
+    fromdb = self.lot_model(self.db.get(lot['id']))
+    fromdb.status = 'pending'
+    fromdb.rectificationPeriod = rectificationPeriod
+    fromdb.store(self.db)
+    return fromdb.id
+
+
+def check_due_lots_status(self):
+    expired_period = Period()
+    expired_period.startDate = get_now() - timedelta(3)
+    expired_period.endDate = calculate_business_date(expired_period.startDate, timedelta(1), None)
+
+    active_period = Period()
+    active_period.startDate = get_now()
+    active_period.endDate = calculate_business_date(active_period.startDate, timedelta(2), None)
+
+    expired_lots = [create_pending_lot(self, expired_period) for _ in range(3)]
+    active_lot = create_pending_lot(self, active_period)
+
+    self.app.authorization = ('Basic', ('chronograph', ''))
+    response = self.app.post_json('/loki/chronograph', {'data': {'until': get_now().isoformat()}})
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(response.content_type, 'application/json')
+    self.assertEqual(sorted(response.json['data']['changed']), sorted(expired_lots))
+    self.assertEqual(response.json['data']['conflicts'], [])
+
+    for lot_id in expired_lots:
+        response = self.app.get('/{}'.format(lot_id))
+        self.assertEqual(response.json['data']['status'], 'active.salable')
+        self.assertNotIn('next_check', response.json['data'])
+
+    response = self.app.get('/{}'.format(active_lot))
+    self.assertEqual(response.json['data']['status'], 'pending')
+    self.assertIn('next_check', response.json['data'])
+
+    # Repeated check doesn't touch already switched lots
+    response = self.app.post_json('/loki/chronograph', {'data': {'until': get_now().isoformat()}})
+    self.assertEqual(response.json['data']['changed'], [])
+
+    # Lot can't be switched before end of rectificationPeriod even if until is in future
+    response = self.app.post_json(
+        '/loki/chronograph',
+        {'data': {'until': (get_now() + timedelta(days=10)).isoformat()}}
+    )
+    self.assertEqual(response.json['data']['changed'], [])
+    response = self.app.get('/{}'.format(active_lot))
+    self.assertEqual(response.json['data']['status'], 'pending')
+
+
+def check_due_lots_status_in_chunks(self):
+    expired_period = Period()
+    expired_period.startDate = get_now() - timedelta(3)
+    expired_period.endDate = calculate_business_date(expired_period.startDate, timedelta(1), None)
+    expired_lots = [create_pending_lot(self, expired_period) for _ in range(5)]
+
+    self.app.authorization = ('Basic', ('chronograph', ''))
+    with mock.patch('openregistry.lots.loki.utils.CHRONOGRAPH_BULK_SIZE', 2):
+        response = self.app.post_json('/loki/chronograph', {'data': {'until': get_now().isoformat()}})
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(sorted(response.json['data']['changed']), sorted(expired_lots))
+
+    for lot_id in expired_lots:
+        response = self.app.get('/{}'.format(lot_id))
+        self.assertEqual(response.json['data']['status'], 'active.salable')
+
+
+def check_due_lots_status_forbidden(self):
+    self.app.authorization = ('Basic', ('broker', ''))
+    response = self.app.post_json(
+        '/loki/chronograph',
+        {'data': {'until': get_now().isoformat()}},
+        status=403
+    )
+    self.assertEqual(response.status, '403 Forbidden')
+    self.assertEqual(response.json['status'], 'error')
+
+
+def check_due_lots_status_invalid_data(self):
+    self.app.authorization = ('Basic', ('chronograph', ''))
+    response = self.app.post_json('/loki/chronograph', {'data': {}}, status=422)
+    self.assertEqual(response.status, '422 Unprocessable Entity')
+    self.assertEqual(response.json['errors'][0]['name'], 'until')
+
+    response = self.app.post_json('/loki/chronograph', {'data': {'until': 'invalid'}}, status=422)
+    self.assertEqual(response.status, '422 Unprocessable Entity')
+    self.assertEqual(response.json['errors'][0]['name'], 'until')
+
+
+def due_lots_feed(self):
+    expired_period = Period()
+    expired_period.startDate = get_now() - timedelta(3)
+    expired_period.endDate = calculate_business_date(expired_period.startDate, timedelta(1), None)
+
+    active_period = Period()
+    active_period.startDate = get_now()
+    active_period.endDate = calculate_business_date(active_period.startDate, timedelta(2), None)
+
+    expired_lots = [create_pending_lot(self, expired_period) for _ in range(3)]
+    active_lot = create_pending_lot(self, active_period)
+
+    response = self.app.get('/loki/due')
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(response.content_type, 'application/json')
+    self.assertEqual(sorted(lot['id'] for lot in response.json['data']), sorted(expired_lots))
+    self.assertNotIn('next_page', response.json)
+
+    response = self.app.get('/loki/due', params={'until': active_period.endDate.isoformat()})
+    self.assertEqual(len(response.json['data']), 4)
+    self.assertEqual(response.json['data'][-1]['id'], active_lot)
+    next_checks = [lot['next_check'] for lot in response.json['data']]
+    self.assertEqual(next_checks, sorted(next_checks))
+
+    # Paginate through the feed
+    params = {'until': active_period.endDate.isoformat(), 'limit': 3}
+    response = self.app.get('/loki/due', params=params)
+    self.assertEqual(len(response.json['data']), 3)
+    self.assertIn('next_page', response.json)
+    params['offset'] = response.json['next_page']['offset']
+    response = self.app.get('/loki/due', params=params)
+    self.assertEqual([lot['id'] for lot in response.json['data']], [active_lot])
+    self.assertNotIn('next_page', response.json)
+
+
+def due_lots_feed_invalid_params(self):
+    response = self.app.get('/loki/due', params={'until': 'invalid'}, status=422)
+    self.assertEqual(response.json['errors'][0]['name'], 'until')
+
+    response = self.app.get('/loki/due', params={'limit': 0}, status=422)
+    self.assertEqual(response.json['errors'][0]['name'], 'limit')
+
+    response = self.app.get('/loki/due', params={'offset': 'invalid'}, status=422)
+    self.assertEqual(response.json['errors'][0]['name'], 'offset')
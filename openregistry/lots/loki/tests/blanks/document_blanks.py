@@ -180,6 +180,47 @@ def put_resource_document_json(self):
                      "Can't update document in current ({}) {} status".format(self.forbidden_document_modification_actions_status, self.resource_name[:-1]))
 
 
+def documents_listing_pagination(self):
+    doc_ids = []
+    for _ in range(2):
+        data = deepcopy(self.initial_document_data)
+        data['url'] = self.generate_docservice_url()
+        response = self.app.post_json('/{}/documents'.format(self.resource_id),
+                                      headers=self.access_header,
+                                      params={'data': data})
+        self.assertEqual(response.status, '201 Created')
+        doc_ids.append(response.json['data']['id'])
+
+    data = deepcopy(self.initial_document_data)
+    data['title'] = 'name.doc'
+    data['url'] = self.generate_docservice_url()
+    response = self.app.put_json('/{}/documents/{}'.format(self.resource_id, doc_ids[0]),
+                                 headers=self.access_header, params={'data': data})
+    self.assertEqual(response.status, '200 OK')
+
+    for params in ({}, {'all': 'true'}):
+        response = self.app.get('/{}/documents'.format(self.resource_id), params=params)
+        self.assertEqual(response.status, '200 OK')
+        documents = response.json['data']
+        self.assertNotIn('next_page', response.json)
+
+        listed = []
+        offset = 0
+        while True:
+            page_params = dict(params, limit=1, offset=offset)
+            response = self.app.get('/{}/documents'.format(self.resource_id), params=page_params)
+            self.assertEqual(response.content_type, 'application/json')
+            listed.extend(response.json['data'])
+            if 'next_page' not in response.json:
+                break
+            offset = response.json['next_page']['offset']
+        self.assertEqual(listed, documents)
+
+    self.assertEqual(documents[-1]['id'], doc_ids[0])
+    self.assertEqual(documents[-1]['title'], u'name.doc')
+    self.assertEqual(len(documents), len(set(d['id'] for d in documents)) + 1)
+
+
 def patch_resource_document(self):
     response = self.app.post_json('/{}/documents'.format(self.resource_id),
                                   headers=self.access_header,
@@ -50,6 +50,45 @@ def item_listing(self):
     self.assertEqual(len(response.json['data']), len(self.initial_data['items']) + 1)
 
 
+def item_listing_pagination(self):
+    response = self.app.get('/{}'.format(self.resource_id))
+    lot = response.json['data']
+
+    self.set_status('draft')
+    add_auctions(self, lot, access_header=self.access_header)
+    self.set_status('pending')
+
+    for _ in range(3):
+        response = self.app.post_json('/{}/items'.format(self.resource_id),
+                                      headers=self.access_header,
+                                      params={'data': self.initial_item_data})
+        self.assertEqual(response.status, '201 Created')
+
+    response = self.app.get('/{}/items'.format(self.resource_id))
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(response.content_type, 'application/json')
+    items = [i['id'] for i in response.json['data']]
+    self.assertNotIn('next_page', response.json)
+
+    listed = []
+    offset = 0
+    while True:
+        response = self.app.get('/{}/items'.format(self.resource_id), params={'limit': 2, 'offset': offset})
+        self.assertEqual(response.status, '200 OK')
+        self.assertLessEqual(len(response.json['data']), 2)
+        listed.extend(i['id'] for i in response.json['data'])
+        if 'next_page' not in response.json:
+            break
+        offset = response.json['next_page']['offset']
+        self.assertIn('offset={}'.format(offset), response.json['next_page']['uri'])
+    self.assertEqual(listed, items)
+
+    response = self.app.get('/{}/items'.format(self.resource_id), params={'limit': 0}, status=422)
+    self.assertEqual(response.json['errors'][0]['name'], 'limit')
+    response = self.app.get('/{}/items'.format(self.resource_id), params={'offset': 'a'}, status=422)
+    self.assertEqual(response.json['errors'][0]['name'], 'offset')
+
+
 def update_items_in_forbidden(self):
     response = self.app.get('/{}'.format(self.resource_id))
     lot = response.json['data']
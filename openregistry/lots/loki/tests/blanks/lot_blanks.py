@@ -534,6 +534,16 @@ def dateModified_resource(self):
     self.assertEqual(response.json['data']['dateModified'], dateModified)
 
 
+def status_changes_listing(self):
+    response = self.app.get('/loki/status_changes')
+    self.assertEqual(response.status, '200 OK')
+    data = response.json['data']
+    self.assertEqual(set(data), set(STATUS_CHANGES))
+    self.assertEqual(data['draft']['next_status'], {'composing': {'roles': ['Administrator', 'lot_owner'], 'hooks': {}}})
+    self.assertEqual(data['pending.deleted']['next_status']['deleted']['hooks'], {'lot': ['cancel_auctions_and_contract']})
+    self.assertEqual(data['sold'], {'editing_permissions': [], 'next_status': {}})
+
+
 def simple_patch(self):
     data = deepcopy(self.initial_data)
     response = create_single_lot(self, data)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from openregistry.lots.core.utils import get_now, calculate_business_date
+from openregistry.lots.core.models import Period
+
+from openregistry.lots.loki.metrics import registry
+from openregistry.lots.loki.tests.blanks.chronograph_blanks import create_pending_lot
+
+
+def lots_metrics(self):
+    registry.clear()
+    expired_period = Period()
+    expired_period.startDate = get_now() - timedelta(3)
+    expired_period.endDate = calculate_business_date(expired_period.startDate, timedelta(1), None)
+    create_pending_lot(self, expired_period)
+
+    self.app.authorization = ('Basic', ('chronograph', ''))
+    self.app.post_json('/loki/chronograph', {'data': {'until': get_now().isoformat()}})
+    self.app.get('/loki/due', params={'limit': 'invalid'}, status=422)
+
+    self.app.authorization = ('Basic', ('broker', ''))
+    response = self.app.get('/loki/metrics', status=403)
+    self.assertEqual(response.status, '403 Forbidden')
+
+    self.app.authorization = ('Basic', ('administrator', ''))
+    response = self.app.get('/loki/metrics')
+    self.assertEqual(response.status, '200 OK')
+    self.assertEqual(response.content_type, 'text/plain')
+    lines = response.text.splitlines()
+
+    self.assertIn('# TYPE loki_lot_transitions_total counter', lines)
+    self.assertIn(
+        'loki_lot_transitions_total{from_status="pending",to_status="active.salable",trigger="chronograph"} 1',
+        lines
+    )
+    self.assertIn('loki_lot_status_duration_seconds_count{status="pending"} 1', lines)
+    self.assertIn('loki_validator_rejections_total{validator="validate_due_lots_params"} 1', lines)
+    self.assertIn('loki_view_duration_seconds_count{view="loki:Lots Chronograph",method="POST",code="200"} 1', lines)
+    self.assertIn('loki_view_duration_seconds_count{view="loki:Due Lots",method="GET",code="422"} 1', lines)
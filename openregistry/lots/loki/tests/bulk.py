@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from openregistry.lots.core.tests.base import snitch
+
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.tests.base import BaseLotWebTest
+from openregistry.lots.loki.tests.blanks.bulk_blanks import (
+    bulk_create_lots,
+    bulk_create_lots_invalid
+)
+
+
+class LotsBulkResourceTest(BaseLotWebTest):
+    docservice = True
+    lot_model = Lot
+
+    test_bulk_create_lots = snitch(bulk_create_lots)
+    test_bulk_create_lots_invalid = snitch(bulk_create_lots_invalid)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(LotsBulkResourceTest))
+    return suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
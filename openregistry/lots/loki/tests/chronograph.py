@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from openregistry.lots.core.tests.base import snitch
+
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.tests.base import BaseLotWebTest
+from openregistry.lots.loki.tests.blanks.chronograph_blanks import (
+    check_due_lots_status,
+    check_due_lots_status_in_chunks,
+    check_due_lots_status_forbidden,
+    check_due_lots_status_invalid_data,
+    due_lots_feed,
+    due_lots_feed_invalid_params
+)
+
+
+class LotsChronographResourceTest(BaseLotWebTest):
+    docservice = True
+    lot_model = Lot
+
+    test_check_due_lots_status = snitch(check_due_lots_status)
+    test_check_due_lots_status_in_chunks = snitch(check_due_lots_status_in_chunks)
+    test_check_due_lots_status_forbidden = snitch(check_due_lots_status_forbidden)
+    test_check_due_lots_status_invalid_data = snitch(check_due_lots_status_invalid_data)
+
+
+class LotsDueResourceTest(BaseLotWebTest):
+    docservice = True
+    lot_model = Lot
+
+    test_due_lots_feed = snitch(due_lots_feed)
+    test_due_lots_feed_invalid_params = snitch(due_lots_feed_invalid_params)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(LotsChronographResourceTest))
+    suite.addTest(unittest.makeSuite(LotsDueResourceTest))
+    return suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -21,7 +21,8 @@ from openregistry.lots.loki.tests.blanks.document_blanks import (
     put_resource_document_json,
     patch_resource_document,
     model_validation,
-    rectificationPeriod_document_workflow
+    rectificationPeriod_document_workflow,
+    documents_listing_pagination
 )
 
 
@@ -40,6 +41,7 @@ class LotDocumentWithDSResourceTest(LotContentWebTest):
     test_08_put_resource_document_json = snitch(put_resource_document_json)
     test_09_model_validation = snitch(model_validation)
     test_10_rectificationPeriod_document_workflow = snitch(rectificationPeriod_document_workflow)
+    test_11_documents_listing_pagination = snitch(documents_listing_pagination)
 
 
     # status, in which operations with lot documents (adding, updating) are forbidden
@@ -14,6 +14,7 @@ from openregistry.lots.loki.tests.blanks.item_blanks import (
     rectificationPeriod_item_workflow,
     update_items_in_forbidden,
     list_item_resource,
+    item_listing_pagination,
     patch_items_with_lot
 )
 from openregistry.lots.loki.constants import LOT_STATUSES
@@ -25,6 +26,7 @@ class LotItemResourceTest(LotContentWebTest):
     test_patch_item_resource = snitch(patch_item)
     test_rectificationPeriod_item_workflow = snitch(rectificationPeriod_item_workflow)
     test_list_item_resource = snitch(list_item_resource)
+    test_item_listing_pagination = snitch(item_listing_pagination)
     test_update_items_in_forbidden = snitch(update_items_in_forbidden)
     test_patch_items_with_lot = snitch(patch_items_with_lot)
 
@@ -38,7 +38,8 @@ from openregistry.lots.loki.tests.blanks.lot_blanks import (
     # LotTest
     simple_add_lot,
     simple_patch,
-    create_lot_check_auctions_registrationFee
+    create_lot_check_auctions_registrationFee,
+    status_changes_listing
 )
 from openregistry.lots.loki.models import Lot
 
@@ -48,6 +49,7 @@ class LotTest(BaseLotWebTest):
     relative_to = os.path.dirname(__file__)
     test_simple_add_lot = snitch(simple_add_lot)
     test_create_lot_check_auctions_registrationFee = snitch(create_lot_check_auctions_registrationFee)
+    test_status_changes_listing = snitch(status_changes_listing)
 
 
 class LotResourceTest(BaseLotWebTest, ResourceTestMixin):
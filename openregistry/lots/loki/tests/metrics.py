@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from datetime import timedelta
+
+from pyramid import testing
+from pyramid.response import Response
+
+from openregistry.lots.core.tests.base import snitch
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.metrics import (
+    LOT_STATUS_DURATION,
+    LOT_TRANSITIONS,
+    Registry,
+    VALIDATOR_REJECTIONS,
+    count_rejections,
+    discard_transitions,
+    get_status_date,
+    observe_transition
+)
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.tests.base import BaseLotWebTest, create_lot_model
+from openregistry.lots.loki.tests.blanks.metrics_blanks import lots_metrics
+
+
+class DummyRequest(object):
+
+    def __init__(self):
+        self.errors = []
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = self.registry.counter('test_total', 'Test counter', ('status',))
+        counter.inc(status='pending')
+        counter.inc(2, status='pending')
+        counter.inc(status='sold')
+        self.assertEqual(counter.get(status='pending'), 3)
+        with self.assertRaises(ValueError):
+            counter.inc(other='pending')
+        self.assertEqual(self.registry.render().splitlines(), [
+            '# HELP test_total Test counter',
+            '# TYPE test_total counter',
+            'test_total{status="pending"} 3',
+            'test_total{status="sold"} 1',
+        ])
+        with self.assertRaises(ValueError):
+            self.registry.counter('test_total', 'Test counter')
+
+    def test_histogram(self):
+        histogram = self.registry.histogram('test_seconds', 'Test histogram', ('view',), buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value, view='a"b')
+        self.assertEqual(histogram.get(view='a"b'), ([2, 1, 1], 14.5))
+        self.assertEqual(self.registry.render().splitlines()[2:], [
+            'test_seconds_bucket{view="a\\"b",le="1"} 2',
+            'test_seconds_bucket{view="a\\"b",le="5"} 3',
+            'test_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+            'test_seconds_sum{view="a\\"b"} 14.5',
+            'test_seconds_count{view="a\\"b"} 4',
+        ])
+
+    def test_count_rejections(self):
+        @count_rejections
+        def validate_raising(request):
+            request.errors.append('error')
+            raise ValueError
+
+        @count_rejections
+        def validate_nested(request):
+            validate_raising(request)
+
+        @count_rejections
+        def validate_adding(request, fail):
+            if fail:
+                request.errors.append('error')
+
+        before = {name: VALIDATOR_REJECTIONS.get(validator=name)
+                  for name in ('validate_raising', 'validate_nested', 'validate_adding')}
+        with self.assertRaises(ValueError):
+            validate_nested(DummyRequest())
+        validate_adding(DummyRequest(), False)
+        validate_adding(DummyRequest(), True)
+        self.assertEqual(VALIDATOR_REJECTIONS.get(validator='validate_raising'), before['validate_raising'] + 1)
+        self.assertEqual(VALIDATOR_REJECTIONS.get(validator='validate_nested'), before['validate_nested'])
+        self.assertEqual(VALIDATOR_REJECTIONS.get(validator='validate_adding'), before['validate_adding'] + 1)
+
+    def test_status_date(self):
+        lot = create_lot_model()
+        lot.date = get_now() - timedelta(days=3)
+        self.assertEqual(get_status_date(lot), lot.date)
+
+        revision_class = Lot.revisions.model_class
+        changed = get_now() - timedelta(days=1)
+        lot.revisions = [
+            revision_class({'date': changed, 'changes': [{'op': 'replace', 'path': '/status', 'value': 'draft'}]}),
+            revision_class({'date': get_now(), 'changes': [{'op': 'replace', 'path': '/title', 'value': 'lot'}]}),
+        ]
+        self.assertEqual(get_status_date(lot), changed)
+
+    def test_transitions_observed_after_save(self):
+        lot = create_lot_model(status='pending')
+        lot.date = get_now() - timedelta(days=1)
+        other_lot = create_lot_model(status='pending')
+        labels = {'from_status': 'pending', 'to_status': 'active.salable', 'trigger': 'chronograph'}
+        transitions = LOT_TRANSITIONS.get(**labels)
+        durations = sum(LOT_STATUS_DURATION.get(status='pending')[0])
+
+        request = testing.DummyRequest()
+        observe_transition(request, lot, 'pending', 'active.salable', 'chronograph')
+        request._process_response_callbacks(Response(status=409))
+        self.assertEqual(LOT_TRANSITIONS.get(**labels), transitions)
+
+        request = testing.DummyRequest()
+        observe_transition(request, lot, 'pending', 'active.salable', 'chronograph')
+        observe_transition(request, other_lot, 'pending', 'active.salable', 'chronograph')
+        discard_transitions(request, [other_lot.id])
+        self.assertEqual(LOT_TRANSITIONS.get(**labels), transitions)
+        request._process_response_callbacks(Response(status=200))
+        self.assertEqual(LOT_TRANSITIONS.get(**labels), transitions + 1)
+        self.assertEqual(sum(LOT_STATUS_DURATION.get(status='pending')[0]), durations + 1)
+
+
+class LotsMetricsResourceTest(BaseLotWebTest):
+    docservice = True
+    lot_model = Lot
+
+    test_lots_metrics = snitch(lots_metrics)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(MetricsTest))
+    suite.addTest(unittest.makeSuite(LotsMetricsResourceTest))
+    return suite
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
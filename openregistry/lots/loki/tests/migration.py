@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
+import json
 import unittest
 
+from StringIO import StringIO
+
+import mock
+
 from openregistry.lots.core.tests.base import MigrationResourcesDTO_mock
 from openregistry.lots.loki.tests.base import BaseLotWebTest
 from openregistry.lots.loki.tests.json_data import test_loki_lot_data
 from openregistry.lots.loki.migration import (
     AddRelatedProcessesStep,
     LokiMigrationsRunner,
+    acquire_lock,
+    main,
+    migrate,
+    release_lock,
+    supports_dry_run,
 )
 
 
@@ -18,8 +28,8 @@ class MigrateTest(BaseLotWebTest):
     def setUp(self):
         super(MigrateTest, self).setUp()
         aliases_info_dict = {'openregistry.lots.loki': ('loki', )}
-        migration_resources = MigrationResourcesDTO_mock(self.db, aliases_info_dict)
-        self.migration_runner = LokiMigrationsRunner(migration_resources)
+        self.migration_resources = MigrationResourcesDTO_mock(self.db, aliases_info_dict)
+        self.migration_runner = LokiMigrationsRunner(self.migration_resources)
 
     def test_migrate_draft_lot(self):
         # Create situation when we need migration for lot in status draft
@@ -149,6 +159,79 @@ class MigrateTest(BaseLotWebTest):
         self.assertEqual(response.json['data']['type'], 'asset')
         self.assertEqual(response.json['data']['identifier'], asset_1_data['assetID'])
 
+    def test_migrate_by_chunks_from_checkpoint(self):
+        self.initial_status = 'pending'
+        self.app.authorization = ('Basic', ('broker', ''))
+
+        lot_ids = []
+        for i in range(5):
+            self.create_resource()
+            asset_id, _ = self.db.save({'assetID': '{}-ASSET-ID'.format(i)})
+            lot = self.db.get(self.resource_id)
+            lot.pop('relatedProcesses', None)
+            lot['assets'] = [asset_id]
+            self.db.save(lot)
+            lot_ids.append(self.resource_id)
+
+        rows = [row for row in self.db.view('lot/all') if row.id in lot_ids]
+        self.db.save({
+            '_id': AddRelatedProcessesStep.CHECKPOINT_DOC,
+            'startkey': rows[0].key,
+            'startkey_docid': rows[0].id
+        })
+
+        step = type('Step', (AddRelatedProcessesStep,), {'chunk_size': 2, 'workers': 2, 'assets_fetch_size': 1})
+        self.migration_runner.migrate((step,), schema_version_max=1)
+
+        self.assertIn('assets', self.db.get(rows[0].id))
+        for row in rows[1:]:
+            lot = self.db.get(row.id)
+            self.assertNotIn('assets', lot)
+            self.assertEqual(len(lot['relatedProcesses']), 1)
+            asset = self.db.get(lot['relatedProcesses'][0]['relatedProcessID'])
+            self.assertEqual(lot['relatedProcesses'][0]['identifier'], asset['assetID'])
+        self.assertIsNone(self.db.get(AddRelatedProcessesStep.CHECKPOINT_DOC))
+
+    def test_dry_run(self):
+        self.initial_status = 'draft'
+        self.app.authorization = ('Basic', ('broker', ''))
+        self.create_resource()
+        lot = self.db.get(self.resource_id)
+        lot.pop('relatedProcesses', None)
+        lot['assets'] = ['1' * 32]
+        self.db.save(lot)
+
+        self.assertEqual(migrate(self.migration_resources, dry_run=True), {'AddRelatedProcessesStep': 1})
+        self.assertIn('assets', self.db.get(self.resource_id))
+
+    def test_main_dry_run(self):
+        def legacy_migration(resources):
+            raise AssertionError('should not be called')
+
+        entry_points = [mock.Mock(), mock.Mock()]
+        entry_points[0].name, entry_points[0].load.return_value = 'main', migrate
+        entry_points[1].name, entry_points[1].load.return_value = 'legacy', legacy_migration
+        self.assertTrue(supports_dry_run(migrate))
+        self.assertFalse(supports_dry_run(legacy_migration))
+
+        stdout = StringIO()
+        with mock.patch('openregistry.lots.loki.migration.Server', return_value={'openregistry': self.db}), \
+                mock.patch('openregistry.lots.loki.migration.iter_entry_points', return_value=entry_points), \
+                mock.patch('sys.stdout', stdout):
+            self.assertEqual(main(['--dry-run', '--db-name', 'openregistry']), 0)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report, {'main': {'AddRelatedProcessesStep': 0}})
+
+    def test_migration_lock(self):
+        lock = acquire_lock(self.db)
+        self.assertIsNotNone(lock)
+        self.assertIsNone(acquire_lock(self.db))
+        release_lock(self.db, lock)
+
+        lock = acquire_lock(self.db, ttl=-1)
+        self.assertIsNotNone(lock)
+        self.assertIsNotNone(acquire_lock(self.db))
+
 
 def suite():
     tests = unittest.TestSuite()
@@ -2,6 +2,7 @@
 import unittest
 import mock
 
+from copy import deepcopy
 from datetime import timedelta
 
 from schematics.exceptions import ModelValidationError
@@ -12,7 +13,14 @@ from openregistry.lots.loki.models import (
     StartDateRequiredPeriod,
     BankAccount,
     Auction,
-    Lot
+    Contract,
+    Lot,
+    LotDocument
+)
+from openregistry.lots.loki.tests.json_data import (
+    test_loki_document_data,
+    test_loki_lot_data,
+    test_lot_contract_data
 )
 
 now = get_now()
@@ -214,9 +222,94 @@ class DummyModelsTest(unittest.TestCase):
         self.assertNotIn('auctionID', edit_serialization)
 
 
+class LazyListsTest(unittest.TestCase):
+
+    def setUp(self):
+        document = deepcopy(test_loki_document_data)
+        self.data = deepcopy(test_loki_lot_data)
+        self.data['documents'] = [dict(document, id=str(i) * 32) for i in range(3)]
+        self.data['contracts'] = [dict(test_lot_contract_data, id='c' * 32)]
+        self.data['auctions'] = [{'id': 'a' * 32, 'tenderAttempts': 1, 'documents': [dict(document, id='d' * 32)]}]
+
+    def test_elements_converted_on_access(self):
+        lot = Lot(self.data)
+        self.assertEqual(lot.documents.loaded(), [])
+        self.assertEqual(len(lot.documents), 3)
+
+        contract = lot.contracts[0]
+        self.assertIsInstance(contract, Contract)
+        self.assertEqual(contract.id, 'c' * 32)
+        self.assertEqual(lot.documents.loaded(), [])
+
+        document = lot.documents[-1]
+        self.assertIsInstance(document, LotDocument)
+        self.assertEqual(lot.documents.loaded(), [(2, document)])
+        self.assertIs(lot.documents[2], document)
+        self.assertEqual([d.id for d in lot.documents[:2]], ['0' * 32, '1' * 32])
+
+    def test_parents(self):
+        lot = Lot(self.data)
+        auction = lot.auctions[0]
+        self.assertIs(auction.__parent__, lot)
+        self.assertIs(auction.documents[0].__parent__, auction)
+
+    def test_serialization_not_changed(self):
+        lot = Lot(self.data)
+        loaded = Lot(self.data)
+        for element in list(loaded.documents) + list(loaded.contracts) + list(loaded.auctions):
+            list(element.get('documents', ()))
+        self.assertEqual(lot.serialize('plain'), loaded.serialize('plain'))
+        self.assertEqual(lot.serialize('plain')['documents'], [
+            LotDocument(d).serialize('plain') for d in self.data['documents']
+        ])
+
+    def test_mutation(self):
+        lot = Lot(self.data)
+        document = LotDocument(dict(test_loki_document_data, id='e' * 32))
+        lot.documents.append(document)
+        self.assertEqual(len(lot.documents), 4)
+        self.assertIs(lot.documents[3], document)
+        lot.documents.remove(document)
+        del lot.contracts[0]
+        self.assertEqual([d['id'] for d in lot.serialize('plain')['documents']], [str(i) * 32 for i in range(3)])
+        self.assertEqual(len(lot.contracts), 0)
+
+    def test_equality(self):
+        self.assertEqual(Lot(self.data).documents, Lot(self.data).documents)
+        self.assertEqual(Lot(self.data).documents, list(Lot(self.data).documents))
+        self.assertNotEqual(Lot(self.data).documents, Lot(self.data).documents[:2])
+
+    def test_positions(self):
+        lot = Lot(self.data)
+        self.assertEqual(lot.documents.positions('1' * 32), [1])
+        self.assertEqual(lot.documents.positions('f' * 32), [])
+        self.assertEqual(lot.documents.loaded(), [])
+
+        version = LotDocument(dict(test_loki_document_data, id='1' * 32))
+        lot.documents.append(version)
+        self.assertEqual(lot.documents.positions('1' * 32), [1, 3])
+        document = LotDocument(test_loki_document_data)
+        lot.documents.append(document)
+        self.assertEqual(lot.documents.positions(document.id), [4])
+
+        del lot.documents[0]
+        self.assertEqual(lot.documents.positions('1' * 32), [0, 2])
+        lot.documents.insert(0, version)
+        self.assertEqual(lot.documents.positions('1' * 32), [0, 1, 3])
+        self.assertEqual(lot.auctions[0].documents.positions('d' * 32), [0])
+
+    def test_conversion_errors_raised_by_validate(self):
+        self.data['contracts'] = ['contract']
+        lot = Lot(self.data)
+        with self.assertRaises(ModelValidationError) as ex:
+            lot.validate()
+        self.assertIn('contracts', ex.exception.messages)
+
+
 def suite():
     tests = unittest.TestSuite()
     tests.addTest(unittest.makeSuite(DummyModelsTest))
+    tests.addTest(unittest.makeSuite(LazyListsTest))
     return tests
 
 
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from pyramid import testing
+
+from openregistry.lots.loki.profiling import (
+    PROFILE_ENVIRON_KEY,
+    ProfilesBuffer,
+    RequestProfile,
+    get_profile,
+    profiled
+)
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.request = testing.DummyRequest()
+        self.config = testing.setUp(request=self.request)
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_buffer_is_bounded(self):
+        buffer = ProfilesBuffer(size=3)
+        for i in range(5):
+            buffer.append({'total': i})
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual([p['total'] for p in buffer.dump()], [2, 3, 4])
+        buffer.clear()
+        self.assertEqual(buffer.dump(), [])
+
+    def test_stages(self):
+        @profiled('save_lot')
+        def save(nested=False):
+            if nested:
+                save()
+            return 'saved'
+
+        self.assertIsNone(get_profile())
+        self.assertEqual(save(), 'saved')
+
+        profile = self.request.environ[PROFILE_ENVIRON_KEY] = RequestProfile(self.request)
+        self.assertIs(get_profile(), profile)
+        self.assertEqual(save(nested=True), 'saved')
+        self.assertEqual(list(profile.stages), ['save_lot'])
+        self.assertEqual(profile.active, set())
+        first = profile.stages['save_lot']
+        save()
+        self.assertGreater(profile.stages['save_lot'], first)
+
+        data = profile.as_dict('loki:Lot Auctions', 200, 1.0)
+        self.assertEqual(data['stages'], profile.stages)
+        self.assertEqual(data['route'], 'loki:Lot Auctions')
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(ProfilingTest))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from datetime import timedelta
+from decimal import Decimal
+
+import simplejson
+from pyramid import testing
+
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.renderers import CONTENT_TYPE, JSONRenderer, dumps
+from openregistry.lots.loki.tests.base import create_lot_model
+
+
+class RendererTest(unittest.TestCase):
+
+    def setUp(self):
+        self.request = testing.DummyRequest()
+        self.config = testing.setUp(request=self.request)
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_same_as_simplejson(self):
+        lot = create_lot_model(items_count=3, documents_count=3)
+        data = {'data': lot.serialize('plain')}
+        self.assertEqual(dumps(data), simplejson.dumps(data))
+        self.assertIsInstance(dumps(data), bytes)
+
+        data = {'amount': Decimal('10.10'), 'title': u'Тестовий лот', 'list': [1, 2.5, None, True]}
+        self.assertEqual(dumps(data), simplejson.dumps(data))
+
+    def test_dates(self):
+        now = get_now()
+        self.assertEqual(dumps([now]), '["{}"]'.format(now.isoformat()))
+        self.assertEqual(dumps([timedelta(days=3)]), '["P3D"]')
+        with self.assertRaises(TypeError):
+            dumps([object()])
+
+    def test_renderer(self):
+        renderer = JSONRenderer(None)
+        self.assertEqual(renderer({'data': [1]}, {'request': self.request}), '{"data": [1]}')
+        self.assertEqual(self.request.response.content_type, CONTENT_TYPE)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(RendererTest))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
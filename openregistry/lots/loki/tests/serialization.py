@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from schematics.transforms import to_primitive
+
+from openregistry.lots.loki.models import Lot, Auction, Contract, LotDocument
+from openregistry.lots.loki.serialization import compile_plan, precompile
+from openregistry.lots.loki.tests.base import create_lot_model
+
+
+class CompiledSerializationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model(items_count=3, documents_count=3)
+
+    def assertSameSerialization(self, model_class, instance, role):
+        compiled = instance.serialize(role)
+        expected = to_primitive(model_class, instance, role=role)
+        self.assertEqual(compiled, expected)
+        self.assertEqual(json.dumps(compiled), json.dumps(expected))
+
+    def test_lot_roles(self):
+        precompile(Lot)
+        for role in [None] + list(Lot._options.roles):
+            self.assertSameSerialization(Lot, self.lot, role)
+
+    def test_subresources_roles(self):
+        for auction in self.lot.auctions:
+            for role in [None] + list(Auction._options.roles):
+                self.assertSameSerialization(Auction, auction, role)
+        for role in [None] + list(Contract._options.roles):
+            self.assertSameSerialization(Contract, self.lot.contracts[0], role)
+        for role in [None] + list(LotDocument._options.roles):
+            self.assertSameSerialization(LotDocument, self.lot.documents[0], role)
+
+    def test_empty_lists(self):
+        lot = create_lot_model(items_count=0, documents_count=0)
+        for role in ('view', 'plain', 'listing'):
+            self.assertSameSerialization(Lot, lot, role)
+
+    def test_plan_is_cached(self):
+        self.assertIs(compile_plan(Lot, 'view'), compile_plan(Lot, 'view'))
+
+    def test_unknown_role(self):
+        with self.assertRaisesRegexp(ValueError, 'Lot Model has no role "test"'):
+            self.lot.serialize('test')
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(CompiledSerializationTest))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import random
+import unittest
+
+from openregistry.lots.loki.constants import STATUS_CHANGES
+from openregistry.lots.loki.state_machine import (
+    AUCTION,
+    LOT,
+    StateMachine,
+    lot_state_machine
+)
+from openregistry.lots.loki.tests.base import create_lot_model
+
+ROLES = ['lot_owner', 'Administrator', 'concierge', 'convoy', 'chronograph', 'caravan', 'broker']
+STATUSES = sorted(STATUS_CHANGES) + ['unknown']
+
+
+class DummyRequest(object):
+
+    def __init__(self, **validated):
+        self.validated = validated
+
+
+class StateMachineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def expected_allowed(self, from_status, to_status, role):
+        changes = STATUS_CHANGES.get(from_status, {'editing_permissions': [], 'next_status': {}})
+        if from_status == to_status:
+            return role in changes['editing_permissions']
+        return role in changes['next_status'].get(to_status, [])
+
+    def test_fuzz_transitions(self):
+        for _ in range(10000):
+            from_status, to_status = self.random.choice(STATUSES), self.random.choice(STATUSES)
+            role = self.random.choice(ROLES)
+            self.assertEqual(
+                lot_state_machine.is_allowed(from_status, to_status, role),
+                self.expected_allowed(from_status, to_status, role),
+                (from_status, to_status, role)
+            )
+
+    def test_fuzz_walks(self):
+        for _ in range(1000):
+            status = 'draft'
+            for _ in range(20):
+                role = self.random.choice(ROLES)
+                next_statuses = lot_state_machine.next_statuses(status, role)
+                self.assertEqual(next_statuses, sorted(
+                    s for s, roles in STATUS_CHANGES[status]['next_status'].items() if role in roles
+                ))
+                if not next_statuses:
+                    continue
+                next_status = self.random.choice(next_statuses)
+                self.assertTrue(lot_state_machine.is_allowed(status, next_status, role))
+                self.assertIn(next_status, STATUS_CHANGES)
+                status = next_status
+
+    def test_hooks_registered_on_known_transitions(self):
+        for from_status, to_status, trigger in lot_state_machine.hooks:
+            self.assertIn((from_status, to_status), lot_state_machine.transitions)
+        machine = StateMachine(STATUS_CHANGES)
+        with self.assertRaises(ValueError):
+            machine.on('draft', 'sold', LOT)
+        with self.assertRaises(ValueError):
+            machine.on('draft', 'composing', 'unknown')
+
+    def test_switch_unknown_transition(self):
+        lot = create_lot_model(status='draft')
+        with self.assertRaises(ValueError):
+            lot_state_machine.switch(DummyRequest(), lot, 'sold', LOT)
+        self.assertEqual(lot.status, 'draft')
+
+    def test_hooks(self):
+        lot = create_lot_model(status='active.auction')
+        auctions = sorted(lot.auctions, key=lambda a: a.tenderAttempts)
+        request = DummyRequest(auction=auctions[0])
+        lot_state_machine.run_hooks(request, lot, 'active.auction', 'pending.dissolution', LOT)
+        self.assertNotEqual(lot.contracts[0].status, 'cancelled')
+
+        lot_state_machine.run_hooks(request, lot, 'active.auction', 'pending.dissolution', AUCTION)
+        self.assertEqual(lot.contracts[0].status, 'cancelled')
+        self.assertEqual([a.status for a in lot.auctions[1:]], ['cancelled', 'cancelled'])
+        self.assertNotEqual(lot.auctions[0].status, 'cancelled')
+
+    def test_describe(self):
+        description = lot_state_machine.describe()
+        self.assertEqual(set(description), set(STATUS_CHANGES))
+        for status, changes in STATUS_CHANGES.items():
+            self.assertEqual(description[status]['editing_permissions'], sorted(changes['editing_permissions']))
+            self.assertEqual(
+                {s: t['roles'] for s, t in description[status]['next_status'].items()},
+                {s: sorted(roles) for s, roles in changes['next_status'].items()}
+            )
+        self.assertEqual(
+            description['active.auction']['next_status']['pending.dissolution']['hooks'],
+            {AUCTION: ['cancel_contract', 'cancel_next_auctions']}
+        )
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(StateMachineTest))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+import mock
+
+from cornice.errors import Errors
+from couchdb.http import ResourceConflict
+from pyramid import testing
+
+from openregistry.lots.core.constants import TZ
+from openregistry.lots.core.utils import get_now
+
+from openregistry.lots.loki.business_date import (
+    LRUCache,
+    calculate_business_date,
+    calculate_business_date_uncached,
+    _cache as business_date_cache
+)
+from openregistry.lots.loki.constants import (
+    CONTRACT_TYPE,
+    DAYS_AFTER_RECTIFICATION_PERIOD,
+    PLATFORM_LEGAL_DETAILS_DOC_DATA
+)
+from openregistry.lots.loki.lazy import LazyModelList
+from openregistry.lots.loki.models import GROUPS_ACL, OWNER_PERMISSIONS, Lot
+from openregistry.lots.loki.prototypes import (
+    _default_auctions_data,
+    _get_prototypes,
+    create_default_auctions,
+    create_default_contract,
+    create_platform_legal_details_document
+)
+from openregistry.lots.loki.roles import (
+    RoleTable,
+    auction_role_table,
+    contract_role_table,
+    lot_role_table,
+    role_tables,
+    validate_role_tables
+)
+from openregistry.lots.loki.utils import (
+    LotState,
+    get_document_versions,
+    get_latest_documents,
+    get_previous_versions,
+    half_in_kopecks,
+    save_lot_changes,
+    update_auctions
+)
+from openregistry.lots.loki.tests.base import create_lot_model
+
+
+class UpdateAuctionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model()
+        self.auctions = sorted(self.lot.auctions, key=lambda a: a.tenderAttempts)
+
+    def test_half_in_kopecks(self):
+        prec = Decimal('0.01')
+        amounts = ['0', '0.01', '0.005', '0.009', '0.015', '1E+3', '3000.87', '300.875', '123456789.123456']
+        amounts.extend('{}.{:02d}'.format(i, j) for i in range(0, 200, 7) for j in range(100))
+        for amount in map(Decimal, amounts):
+            expected = (amount / 2).quantize(prec, ROUND_HALF_UP)
+            self.assertEqual(Decimal(half_in_kopecks(amount)).scaleb(-2), expected)
+
+    def test_update_auctions(self):
+        english, second_english, insider = self.auctions
+        update_auctions(self.lot)
+
+        for auction in (second_english, insider):
+            self.assertEqual(auction.value.amount, Decimal('1500.44'))
+            self.assertEqual(auction.guarantee.amount, Decimal('350.44'))
+            self.assertEqual(auction.value.currency, english.value.currency)
+            self.assertEqual(auction.bankAccount.serialize(), english.bankAccount.serialize())
+        self.assertEqual(second_english.minimalStep.amount, Decimal('150.44'))
+        self.assertEqual(insider.minimalStep.amount, 0)
+        self.assertEqual(insider.tenderingDuration, second_english.tenderingDuration)
+
+    def test_unchanged_source_is_not_rebuilt(self):
+        english, second_english, insider = self.auctions
+        update_auctions(self.lot)
+        value = second_english.value
+        minimalStep = insider.minimalStep
+
+        update_auctions(self.lot)
+        self.assertIs(second_english.value, value)
+        self.assertIs(insider.minimalStep, minimalStep)
+
+        english.value.amount = Decimal('5000.01')
+        update_auctions(self.lot)
+        self.assertIsNot(second_english.value, value)
+        self.assertEqual(second_english.value.amount, Decimal('2500.01'))
+        self.assertIs(insider.minimalStep, minimalStep)
+
+
+class SaveLotChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model()
+        self.request = testing.DummyRequest()
+        self.config = testing.setUp(request=self.request)
+        self.request.errors = Errors()
+        self.request.registry.db = mock.Mock()
+        self.request.validated = {'lot': self.lot, 'lot_src': self.lot.serialize('plain')}
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_concurrent_update_conflict(self):
+        self.lot.contracts[0].status = 'cancelled'
+        with mock.patch.object(Lot, 'store', side_effect=ResourceConflict('Document update conflict.')):
+            self.assertFalse(save_lot_changes(self.request))
+        self.assertEqual(self.request.errors.status, 409)
+        self.assertEqual(self.request.errors[0]['name'], 'data')
+
+
+class DocumentVersionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model(documents_count=2)
+        self.document_class = type(self.lot.documents[0])
+        for document in self.lot.documents:
+            document.__parent__ = self.lot
+
+    def add_version(self, document, **kwargs):
+        data = document.serialize('plain')
+        data.update(kwargs)
+        version = self.document_class(data)
+        version.__parent__ = self.lot
+        self.lot.documents.append(version)
+        return version
+
+    def test_document_versions(self):
+        first, second = self.lot.documents
+        self.assertEqual(get_document_versions(self.lot), {first.id: [0], second.id: [1]})
+
+    def test_add_version(self):
+        first, second = self.lot.documents
+        version = self.add_version(first, url='http://localhost/new', dateModified=get_now().isoformat())
+        self.assertEqual(get_document_versions(self.lot), {first.id: [0, 2], second.id: [1]})
+        self.assertEqual(get_latest_documents(self.lot), [second, version])
+        self.assertEqual(get_previous_versions(version), [first])
+        self.assertEqual(get_previous_versions(second), [])
+
+
+class BusinessDateTest(unittest.TestCase):
+
+    def setUp(self):
+        business_date_cache.clear()
+        self.lot = create_lot_model()
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_calculate_business_date(self):
+        start = get_now()
+        for working_days in (True, False):
+            expected = calculate_business_date_uncached(
+                start=start, delta=DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=working_days
+            )
+            for _ in range(2):
+                result = calculate_business_date(
+                    start=start, delta=DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=working_days
+                )
+                self.assertEqual(result, expected)
+        self.assertEqual((business_date_cache.hits, business_date_cache.misses), (2, 2))
+
+    def test_starts_on_same_date_share_cache(self):
+        for day in (datetime(2018, 1, 5), datetime(2018, 1, 6)):  # friday and saturday
+            business_date_cache.clear()
+            for hour in (9, 18):
+                start = TZ.localize(day.replace(hour=hour, minute=30))
+                for working_days in (True, False):
+                    expected = calculate_business_date_uncached(
+                        start=start, delta=DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=working_days
+                    )
+                    result = calculate_business_date(
+                        start, DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=working_days
+                    )
+                    self.assertEqual(result, expected)
+            self.assertEqual((business_date_cache.hits, business_date_cache.misses), (2, 2))
+
+    def test_acceleration_is_part_of_key(self):
+        start = get_now()
+        calculate_business_date(start, DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=True)
+        self.lot.mode = u'test'
+        calculate_business_date(start, DAYS_AFTER_RECTIFICATION_PERIOD, context=self.lot, working_days=True)
+        self.assertEqual(business_date_cache.misses, 2)
+
+
+class LotStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model()
+
+    def test_lot_state(self):
+        now = get_now()
+        lot_state = LotState(self.lot, now=now)
+        self.assertIs(lot_state.now, now)
+        self.assertFalse(lot_state.rectification_period_ended)
+        self.assertFalse(lot_state.has_cancellation_details)
+        self.assertEqual(lot_state.decisions_of, frozenset(d.decisionOf for d in self.lot.decisions))
+        self.assertEqual([a.tenderAttempts for a in lot_state.sorted_auctions], [1, 2, 3])
+
+    def test_facts_are_computed_once(self):
+        lot_state = LotState(self.lot)
+        self.assertFalse(lot_state.has_cancellation_details)
+        self.lot.documents[0].documentType = 'cancellationDetails'
+        self.assertFalse(lot_state.has_cancellation_details)
+        self.assertTrue(LotState(self.lot).has_cancellation_details)
+
+        period_type = type(self.lot).rectificationPeriod.model_class
+        now = get_now()
+        self.lot.rectificationPeriod = period_type({'startDate': now, 'endDate': now})
+        self.assertFalse(LotState(self.lot, now=now).rectification_period_ended)
+        self.assertTrue(LotState(self.lot, now=now + DAYS_AFTER_RECTIFICATION_PERIOD).rectification_period_ended)
+
+
+class PrototypesTest(unittest.TestCase):
+
+    def assertSameModel(self, clone, model, dates=()):
+        clone_data, model_data = clone.serialize(), model.serialize()
+        self.assertNotEqual(clone_data.pop('id'), model_data.pop('id'))
+        for name in dates:
+            self.assertIn(name, clone_data)
+            clone_data.pop(name), model_data.pop(name)
+        self.assertEqual(clone_data, model_data)
+
+    def test_default_auctions(self):
+        auction_class = Lot.auctions.model_class
+        first, second = create_default_auctions(auction_class), create_default_auctions(auction_class)
+        self.assertEqual([a.procurementMethodType for a in first],
+                         ['sellout.english', 'sellout.english', 'sellout.insider'])
+        self.assertEqual([a.tenderAttempts for a in first], [1, 2, 3])
+        self.assertEqual(first[2].auctionParameters.dutchSteps, 99)
+        for clone, other in zip(first, second):
+            self.assertSameModel(clone, other)
+            self.assertIsNot(clone.auctionParameters, other.auctionParameters)
+            self.assertIsNot(clone.documents, other.documents)
+
+        first[0].auctionParameters.type = 'insider'
+        self.assertEqual(create_default_auctions(auction_class)[0].auctionParameters.type, 'english')
+
+    def test_clone_does_not_share_prototype_state(self):
+        auction_class = Lot.auctions.model_class
+        auction = create_default_auctions(auction_class)[0]
+        prototype = _get_prototypes(auction_class, 'auctions', _default_auctions_data)[0]
+        prototype_data = prototype.serialize()
+        self.assertIsInstance(auction.documents, LazyModelList)
+        self.assertIs(auction.documents.__parent__, auction)
+        self.assertIsNot(auction._initial, prototype._initial)
+
+        document_class = auction_class.documents.model_class
+        auction.documents.append(document_class({'title': u'name.doc'}))
+        auction.auctionParameters.dutchSteps = 50
+        auction._initial['status'] = 'cancelled'
+        self.assertEqual(len(prototype.documents), 0)
+        self.assertEqual(prototype.serialize(), prototype_data)
+        self.assertEqual(prototype._initial['status'], 'scheduled')
+
+    def test_default_contract(self):
+        contract_class = Lot.contracts.model_class
+        contract = create_default_contract(contract_class)
+        self.assertEqual(contract.type, CONTRACT_TYPE)
+        self.assertSameModel(contract, contract_class({'type': CONTRACT_TYPE}))
+
+    def test_platform_legal_details_document(self):
+        document_class = Lot.documents.model_class
+        model = document_class(PLATFORM_LEGAL_DETAILS_DOC_DATA)
+        document = create_platform_legal_details_document(document_class)
+        self.assertSameModel(document, model, dates=('datePublished', 'dateModified'))
+        self.assertGreaterEqual(document.dateModified, model.dateModified)
+
+
+class LotAclTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lot = create_lot_model()
+        self.lot.owner, self.lot.owner_token = 'broker', 'token'
+
+    def test_acl(self):
+        acl = self.lot.__acl__()
+        owner_acl = [ace for ace in acl if ace[1] == 'broker_token']
+        self.assertEqual([ace[2] for ace in owner_acl], list(OWNER_PERMISSIONS))
+        self.assertEqual(acl[len(owner_acl):], list(GROUPS_ACL))
+        self.assertIs(self.lot.__acl__(), acl)
+
+    def test_acl_invalidated_on_owner_change(self):
+        acl = self.lot.__acl__()
+        self.lot.owner_token = 'new_token'
+        new_acl = self.lot.__acl__()
+        self.assertIsNot(new_acl, acl)
+        self.assertEqual({ace[1] for ace in new_acl[:len(OWNER_PERMISSIONS)]}, {'broker_new_token'})
+        self.lot.owner = 'broker2'
+        self.assertEqual(self.lot.__acl__()[0][1], 'broker2_new_token')
+
+
+class RoleTableTest(unittest.TestCase):
+
+    def test_role_tables_valid(self):
+        validate_role_tables()
+        for table in role_tables:
+            for role in table.by_state.values():
+                self.assertIn(role, table.roles)
+
+    def test_missing_role(self):
+        table = RoleTable('Lot', {'edit_draft': None}, {'Administrator': 'Administrator'},
+                          by_state={('draft', False): 'edit_draft', ('sold', False): 'edit_sold'})
+        with self.assertRaises(ValueError) as context:
+            table.validate()
+        self.assertIn('Administrator, edit_sold', context.exception.message)
+
+    def test_lot_roles(self):
+        self.assertEqual(lot_role_table.resolve('concierge', ('pending', True)), 'concierge')
+        self.assertEqual(lot_role_table.resolve('broker', ('pending', False)), 'edit_pending')
+        self.assertEqual(lot_role_table.resolve('broker', ('pending', True)), 'edit_pendingAfterRectificationPeriod')
+        self.assertEqual(lot_role_table.resolve('broker', ('sold', False)), 'edit_sold')
+        self.assertIsNone(lot_role_table.resolve('broker', ('unknown', False)))
+
+    def test_auction_roles(self):
+        self.assertEqual(auction_role_table.resolve('broker', (2, 'sellout.english')), 'edit_2.sellout.english')
+        self.assertEqual(auction_role_table.resolve('convoy', (2, 'sellout.english')), 'convoy')
+        self.assertIsNone(auction_role_table.resolve('Administrator', (1, 'sellout.english')))
+        self.assertIsNone(auction_role_table.resolve('broker', (3, 'sellout.english')))
+
+    def test_contract_roles(self):
+        self.assertEqual(contract_role_table.resolve('caravan'), 'caravan')
+        self.assertIsNone(contract_role_table.resolve('broker'))
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(UpdateAuctionsTest))
+    tests.addTest(unittest.makeSuite(SaveLotChangesTest))
+    tests.addTest(unittest.makeSuite(DocumentVersionsTest))
+    tests.addTest(unittest.makeSuite(BusinessDateTest))
+    tests.addTest(unittest.makeSuite(LotStateTest))
+    tests.addTest(unittest.makeSuite(PrototypesTest))
+    tests.addTest(unittest.makeSuite(LotAclTest))
+    tests.addTest(unittest.makeSuite(RoleTableTest))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main(defaultTest='suite')
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Traversal of loki lot sub-resources by id index
+
+The lot is resolved by core, its items, decisions, auctions, contracts and
+documents are then found with the id index of lot collections instead of a
+scan of every element. Views of process internals, such as metrics, get a
+context readable by administrators only.
+"""
+from pyramid.security import Allow
+
+from openregistry.lots.core.traversal import factory as lot_factory
+from openregistry.lots.core.utils import error_handler
+
+from openregistry.lots.loki.lazy import get_positions
+
+
+# sub-resources in the order they are nested in urls
+SUBRESOURCES = ('item', 'decision', 'auction', 'contract', 'document')
+
+INTERNALS_PERMISSION = 'view_loki_internals'
+
+
+def get_item(parent, key, request):
+    item_id = request.matchdict['{}_id'.format(key)]
+    request.validated['{}_id'.format(key)] = item_id
+    collection = getattr(parent, '{}s'.format(key), None) or []
+    items = [collection[position] for position in get_positions(collection, item_id)]
+    if not items:
+        request.errors.add('url', '{}_id'.format(key), 'Not Found')
+        request.errors.status = 404
+        raise error_handler(request)
+    if key == 'document':
+        request.validated['documents'] = items
+    item = items[-1]
+    request.validated[key] = item
+    request.validated['id'] = item_id
+    item.__parent__ = parent
+    return item
+
+
+def factory(request):
+    matchdict = request.matchdict or {}
+    keys = [key for key in SUBRESOURCES if matchdict.get('{}_id'.format(key))]
+    if not keys:
+        return lot_factory(request)
+    request.matchdict = dict(
+        (name, value) for name, value in matchdict.items()
+        if name not in ['{}_id'.format(key) for key in keys]
+    )
+    try:
+        context = lot_factory(request)
+    finally:
+        request.matchdict = matchdict
+    for key in keys:
+        context = get_item(context, key, request)
+    return context
+
+
+class InternalsRoot(object):
+    """Context of views of process internals"""
+    __name__ = None
+    __parent__ = None
+    __acl__ = [
+        (Allow, 'g:Administrator', INTERNALS_PERMISSION),
+    ]
+
+    def __init__(self, request):
+        self.request = request
@@ -1,6 +1,72 @@
 # -*- coding: utf-8 -*-
-from openregistry.lots.core.utils import get_now, context_unpack, LOGGER
-from decimal import Decimal, ROUND_HALF_UP
+from hashlib import md5
+
+from couchdb.http import ResourceConflict
+from pyramid.decorator import reify
+from pyramid.httpexceptions import HTTPError
+from pyramid.response import Response
+from schematics.exceptions import ModelValidationError
+from openprocurement.api.utils import generate_id, get_revision_changes, set_ownership
+from openregistry.lots.core.constants import TZ
+from openregistry.lots.core.events import LotInitializeEvent
+from openregistry.lots.core.interfaces import ILotManager
+from openregistry.lots.core.utils import get_now, context_unpack, error_handler, generate_lot_id, save_lot, LOGGER
+from openregistry.lots.core.validation import validate_data
+from decimal import Decimal
+
+from openregistry.lots.loki.constants import (
+    BULK_CREATE_CHUNK_SIZE,
+    CHRONOGRAPH_BULK_SIZE,
+    DEFAULT_LOT_TYPE,
+    DERIVED_AUCTION_FIELDS
+)
+from openregistry.lots.loki.design import LOKI_DESIGN
+from openregistry.lots.loki.lazy import LazyModelList
+from openregistry.lots.loki.metrics import discard_transitions, observe_transition
+from openregistry.lots.loki.models import Lot
+from openregistry.lots.loki.profiling import profiled
+from openregistry.lots.loki.renderers import dumps
+from openregistry.lots.loki.state_machine import (
+    AUCTION,
+    CHRONOGRAPH,
+    CONTRACT,
+    LOT,
+    lot_state_machine
+)
+
+
+class LotState(object):
+    """Facts about a lot checked by validators, each computed on first access"""
+
+    def __init__(self, lot, now=None):
+        self.lot = lot
+        self._now = now
+
+    @reify
+    def now(self):
+        return self._now or get_now()
+
+    @reify
+    def rectification_period_ended(self):
+        period = self.lot.rectificationPeriod
+        return bool(period and period.endDate < self.now)
+
+    @reify
+    def decisions_of(self):
+        return frozenset(decision.decisionOf for decision in self.lot.decisions)
+
+    @reify
+    def has_cancellation_details(self):
+        return any(document.documentType == 'cancellationDetails' for document in self.lot.documents)
+
+    @reify
+    def sorted_auctions(self):
+        return sorted(self.lot.auctions, key=lambda a: a.tenderAttempts)
+
+
+def get_lot_state(request):
+    """Request property with LotState of the validated lot"""
+    return LotState(request.validated['lot'])
 
 
 def check_status(request):
@@ -14,59 +80,272 @@ def check_lot_status(request, lot, now=None):
         now = get_now()
 
     if lot.status == 'pending' and lot.rectificationPeriod.endDate <= now:
-        LOGGER.info('Switched lot %s to %s', lot.id, 'active.salable',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_active.salable'}))
-        lot.status = 'active.salable'
+        lot_state_machine.switch(request, lot, 'active.salable', CHRONOGRAPH)
 
 
-def process_convoy_auction_report_result(request):
-    lot = request.validated['lot']
+def add_lot_revision(request, lot, patch):
+    lot.revisions.append(type(lot).revisions.model_class({
+        'author': request.authenticated_userid,
+        'changes': patch,
+        'rev': lot.rev
+    }))
+
+
+@profiled('save_lot')
+def save_lot_changes(request):
+    """save_lot answering 409 when the lot was saved by a concurrent request since it was loaded"""
+    try:
+        return save_lot(request)
+    except ResourceConflict as e:
+        request.errors.add('body', 'data', str(e))
+        request.errors.status = 409
+
+
+def get_document_versions(context):
+    """Positions of versions of every document of lot or auction `context` by document id"""
+    documents = context.documents
+    if isinstance(documents, LazyModelList):
+        return documents.id_index()
+    index = {}
+    for position, document in enumerate(documents):
+        index.setdefault(document.id, []).append(position)
+    return index
+
+
+def get_latest_documents(context):
+    """Last version of every document of `context`, ordered by dateModified"""
+    documents = context.documents
+    latest = [documents[positions[-1]] for positions in get_document_versions(context).values()]
+    return sorted(latest, key=lambda document: document.dateModified)
+
+
+def get_previous_versions(document):
+    """Earlier versions of `document` with other files"""
+    context = document.__parent__
+    return [
+        context.documents[position]
+        for position in get_document_versions(context).get(document.id, [])
+        if context.documents[position].url != document.url
+    ]
+
+
+def get_etag(lot, key):
+    """Strong ETag of lot part addressed by `key`, changed by every save of the lot"""
+    dateModified = lot.dateModified.isoformat() if lot.dateModified else ''
+    return md5('{}|{}|{}'.format(lot.rev, dateModified, key)).hexdigest()
+
+
+def _iter_collection_json(objects, role, next_page):
+    yield '{"data": ['
+    for index, obj in enumerate(objects):
+        yield (', ' if index else '') + dumps(obj.serialize(role))
+    yield ']'
+    if next_page:
+        yield ', "next_page": ' + dumps(next_page)
+    yield '}'
+
+
+def stream_collection(request, objects, role='view'):
+    """Streamed json response with page of `objects` selected by validated limit and offset
+
+    Objects are serialized one by one while the response body is written.
+    """
+    limit, offset = request.validated['limit'], request.validated['offset']
+    end = len(objects) if limit is None else offset + limit
+    next_page = None
+    if end < len(objects):
+        params = dict(request.params, offset=end)
+        next_page = {
+            'offset': end,
+            'path': request.current_route_path(_query=params),
+            'uri': request.current_route_url(_query=params)
+        }
+    app_iter = _iter_collection_json(objects[offset:end], role, next_page)
+    response = Response(app_iter=app_iter, content_type='application/json', charset='utf-8')
+    response.etag = request.response.etag
+    return response
+
 
-    is_lot_need_to_be_dissolved = bool(
-        request.validated['auction'].status == 'cancelled' or
-        all([auction.status == 'unsuccessful' for auction in lot.auctions])
-    )
+def get_due_lots(db, until, startkey=None, limit=CHRONOGRAPH_BULK_SIZE, skip=0, include_docs=True):
+    """Return rows of the loki/by_next_check view up to `until`
 
-    if lot.status == 'active.auction' and is_lot_need_to_be_dissolved:
-        LOGGER.info('Switched lot %s to %s', lot.id, 'pending.dissolution',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_pending.dissolution'}))
+    Rows are keyed by [next_check, lot id] and sorted by next_check.
+    """
+    options = {
+        'endkey': [until.astimezone(TZ).isoformat(), {}],
+        'include_docs': include_docs,
+        'limit': limit,
+    }
+    if startkey:
+        options['startkey'] = startkey
+    if skip:
+        options['skip'] = skip
+    return db.view('{}/by_next_check'.format(LOKI_DESIGN), **options).rows
 
-        lot.status = 'pending.dissolution'
-        lot.contracts[0].status = 'cancelled'
 
-        for auction in lot.auctions[request.validated['auction'].tenderAttempts:]:
-            auction.status = 'cancelled'
+@profiled('save_lot')
+def store_lots(request, lots, now):
+    """Store lots with a single _bulk_docs request
 
-    elif lot.status == 'active.auction' and request.validated['auction'].status == 'unsuccessful':
-        LOGGER.info('Switched lot %s to %s', lot.id, 'active.salable',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_active.salable'}))
-        lot.status = 'active.salable'
-    elif lot.status == 'active.auction' and request.validated['auction'].status == 'complete':
-        LOGGER.info('Switched lot %s to %s', lot.id, 'active.contracting',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_active.contracting'}))
-        lot.status = 'active.contracting'
-        for auction in lot.auctions[request.validated['auction'].tenderAttempts:]:
-            auction.status = 'cancelled'
+    Revision and dateModified are updated the same way as save_lot does it.
+    Returns lists of stored, conflicted and failed lot ids.
+    """
+    stored, conflicts, errors = [], [], []
+    docs = []
+    for lot, src in lots:
+        patch = get_revision_changes(lot.serialize('plain'), src)
+        if not patch:
+            continue
+        add_lot_revision(request, lot, patch)
+        lot.dateModified = now
+        try:
+            lot.validate()
+        except ModelValidationError as e:
+            LOGGER.error('Failed to validate lot {}: {}'.format(lot.id, e.messages),
+                         extra=context_unpack(request, {'MESSAGE_ID': 'bulk_lot_validation_error'}))
+            errors.append(lot.id)
+        else:
+            docs.append(lot.to_primitive())
+
+    if not docs:
+        return stored, conflicts, errors
+
+    for success, doc_id, rev_or_exc in request.registry.db.update(docs):
+        if success:
+            stored.append(doc_id)
+            LOGGER.info('Saved lot {}: dateModified -> {}'.format(doc_id, now.isoformat()),
+                        extra=context_unpack(request, {'MESSAGE_ID': 'save_lot'}, {'RESULT': rev_or_exc}))
+        elif isinstance(rev_or_exc, ResourceConflict):
+            conflicts.append(doc_id)
+        else:
+            LOGGER.error('Failed to save lot {}: {}'.format(doc_id, rev_or_exc),
+                         extra=context_unpack(request, {'MESSAGE_ID': 'bulk_lot_save_error'}))
+            errors.append(doc_id)
+    return stored, conflicts, errors
+
+
+def init_lot(request, data):
+    """Validate lot `data` and run create pipeline of its lotType, as POST of a single lot does
+
+    Lots without lotType are created as loki lots of the default type.
+    """
+    model = request.lot_from_data({'lotType': data.get('lotType', DEFAULT_LOT_TYPE)}, create=False)
+    if not issubclass(model, Lot):
+        request.errors.add('body', 'lotType', 'Lot type is not supported by loki bulk creation')
+        request.errors.status = 422
+        raise error_handler(request)
+    lot = model(validate_data(request, model, data=data))
+    lot.__parent__ = request.context
+    lot.id = generate_id()
+    lot.lotID = generate_lot_id(get_now(), request.registry.db, request.registry.server_id)
+    request.registry.notify(LotInitializeEvent(lot))
+
+    request.validated['lot'] = lot
+    request.validated['lot_src'] = {}
+    request.registry.getAdapter(lot, ILotManager).create_lot(request)
+    set_ownership(lot, request)
+    return lot
+
+
+def create_lots(request, lots_data):
+    """Create lots from list of lot data, lots are stored by chunks with a single _bulk_docs request each
+
+    Returns result for every lot in the same order: created lot with its
+    access token or errors.
+    """
+    results = []
+    lots = []
+    for data in lots_data:
+        try:
+            lot = init_lot(request, data)
+        except HTTPError:
+            results.append({'errors': list(request.errors)})
+            del request.errors[:]
+            request.errors.status = 400
+        else:
+            lots.append((len(results), lot))
+            results.append(None)
+
+    now = get_now()
+    for i in range(0, len(lots), BULK_CREATE_CHUNK_SIZE):
+        chunk = lots[i:i + BULK_CREATE_CHUNK_SIZE]
+        stored, _, _ = store_lots(request, [(chunk_lot, {}) for _, chunk_lot in chunk], now)
+        stored = set(stored)
+        for index, lot in chunk:
+            if lot.id in stored:
+                LOGGER.info('Created lot {} ({})'.format(lot.id, lot.lotID),
+                            extra=context_unpack(request, {'MESSAGE_ID': 'lot_create'},
+                                                 {'lot_id': lot.id, 'lotID': lot.lotID}))
+                results[index] = {'data': lot.serialize('view'), 'access': {'token': lot.owner_token}}
+            else:
+                results[index] = {'errors': [{'location': 'body', 'name': 'data', 'description': 'Failed to save lot'}]}
+    return results
+
+
+def check_due_lots_status(request, until):
+    """Check status of every loki lot with next_check not later than `until`
+
+    Lots are fetched and stored in chunks of CHRONOGRAPH_BULK_SIZE, one
+    _bulk_docs request per chunk. Stored lots drop out of the view, so every
+    chunk is read from the start of the view, past lots which stay in it
+    because they failed, conflicted or weren't changed.
+    """
+    now = get_now()
+    until = min(until, now)
+    result = {'changed': [], 'conflicts': [], 'errors': []}
+    left = set()
+    while True:
+        page = get_due_lots(request.registry.db, until, limit=CHRONOGRAPH_BULK_SIZE, skip=len(left))
+        rows = [row for row in page if (tuple(row.key), row.id) not in left]
+        if not rows:
+            break
+
+        lots = []
+        for row in rows:
+            lot = Lot(row.doc)
+            src = lot.serialize('plain')
+            check_lot_status(request, lot, now)
+            lots.append((lot, src))
+        stored, conflicts, errors = store_lots(request, lots, now)
+        discard_transitions(request, conflicts + errors)
+        result['changed'].extend(stored)
+        result['conflicts'].extend(conflicts)
+        result['errors'].extend(errors)
+        stored = set(stored)
+        left.update((tuple(row.key), row.id) for row in rows if row.id not in stored)
+
+        if len(page) < CHRONOGRAPH_BULK_SIZE:
+            break
+    return result
+
+
+def process_convoy_auction_report_result(request):
+    lot = request.validated['lot']
+    auction = request.validated['auction']
+    if lot.status != 'active.auction':
+        return
+
+    if auction.status == 'cancelled' or all(a.status == 'unsuccessful' for a in lot.auctions):
+        lot_state_machine.switch(request, lot, 'pending.dissolution', AUCTION)
+    elif auction.status == 'unsuccessful':
+        lot_state_machine.switch(request, lot, 'active.salable', AUCTION)
+    elif auction.status == 'complete':
+        lot_state_machine.switch(request, lot, 'active.contracting', AUCTION)
 
 
 def process_concierge_auction_status_change(request):
     lot = request.validated['lot']
 
     if lot.status == 'active.salable' and request.validated['auction'].status == 'active':
-        LOGGER.info('Switched lot %s to %s', lot.id, 'active.auction',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_active.auction'}))
-        lot.status = 'active.auction'
+        lot_state_machine.switch(request, lot, 'active.auction', AUCTION)
 
 
 def process_lot_status_change(request):
     lot = request.context
-
-    if lot.status == 'pending.deleted' and request.validated['data'].get('status') == 'deleted':
-        for auction in lot.auctions:
-            auction.status = 'cancelled'
-        lot.contracts[0].status = 'cancelled'
-    elif lot.status == 'active.salable' and request.validated['data'].get('status') == 'composing':
-        lot.rectificationPeriod = None
+    status = request.validated['data'].get('status')
+    if status and status != lot.status and lot_state_machine.is_allowed(lot.status, status, request.authenticated_role):
+        observe_transition(request, lot, lot.status, status, LOT)
+        lot_state_machine.run_hooks(request, lot, lot.status, status, LOT)
 
 
 def process_caravan_contract_report_result(request):
@@ -74,37 +353,60 @@ def process_caravan_contract_report_result(request):
     contract = request.validated['contract']
 
     if lot.status == 'active.contracting' and contract.status == 'unsuccessful':
-        LOGGER.info('Switched lot %s to %s', lot.id, 'pending.dissolution',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_pending.dissolution'}))
-        lot.status = 'pending.dissolution'
+        lot_state_machine.switch(request, lot, 'pending.dissolution', CONTRACT)
     elif lot.status == 'active.contracting' and contract.status == 'complete':
-        LOGGER.info('Switched lot %s to %s', lot.id, 'pending.sold',
-                    extra=context_unpack(request, {'MESSAGE_ID': 'switched_lot_pending.sold'}))
-        lot.status = 'pending.sold'
+        lot_state_machine.switch(request, lot, 'pending.sold', CONTRACT)
+
+
+def half_in_kopecks(amount):
+    """Half of Decimal `amount` in kopecks, rounded with ROUND_HALF_UP semantics"""
+    sign, digits, exponent = amount.as_tuple()
+    numerator = int(''.join(map(str, digits))) * 100
+    if exponent >= 0:
+        numerator *= 10 ** exponent
+        denominator = 2
+    else:
+        denominator = 2 * 10 ** -exponent
+    kopecks, remainder = divmod(numerator, denominator)
+    if 2 * remainder >= denominator:
+        kopecks += 1
+    return -kopecks if sign else kopecks
 
 
+@profiled('update_auctions')
 def update_auctions(lot):
-    prec = Decimal('0.01')
+    """Recalculate second english and insider auctions from the first english one
+
+    Source fields are serialized once, and sub-models of derived auctions
+    which already hold the expected data are left untouched.
+    """
     auctions = sorted(lot.auctions, key=lambda a: a.tenderAttempts)
     english = auctions[0]
     second_english = auctions[1]
     insider = auctions[2]
+    fields = type(english)._fields
+
+    for key, halved in DERIVED_AUCTION_FIELDS:
+        source = english[key]
+        if not source:
+            continue
+        source_data = source.serialize()
+        amount_field = type(source)._fields.get('amount')
 
-    auto_calculated_fields = ['value', 'minimalStep', 'registrationFee', 'guarantee', 'bankAccount']
-    auto_calculated_fields = filter(
-        lambda f: getattr(english, f, None), auto_calculated_fields
-    )
+        for auction in (second_english, insider):
+            expected = source_data
+            amount = None
+            if halved:
+                if key == 'minimalStep' and auction.procurementMethodType == 'sellout.insider':
+                    amount = 0
+                else:
+                    amount = Decimal(half_in_kopecks(source.amount)).scaleb(-2)
+                expected = dict(source_data, amount=amount_field.to_primitive(amount))
 
-    for auction in (second_english, insider):
-        for key in auto_calculated_fields:
-            object_class = getattr(lot.__class__.auctions.model_class, key)
-            auction[key] = object_class(english[key].serialize())
-            if key in ['registrationFee', 'bankAccount']:
+            if auction[key] is not None and auction[key].serialize() == expected:
                 continue
-            else:
-                auction[key]['amount'] = (
-                    0 if key == 'minimalStep' and auction.procurementMethodType == 'sellout.insider'
-                    else (english[key]['amount'] / 2).quantize(prec, ROUND_HALF_UP)
-                )
+            auction[key] = fields[key](source_data)
+            if halved:
+                auction[key]['amount'] = amount
 
     insider.tenderingDuration = second_english.tenderingDuration
@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+from pyramid.httpexceptions import HTTPNotModified
+from schematics.exceptions import ConversionError, ModelConversionError, ModelValidationError
+
+from openprocurement.api.utils import apply_data_patch
+
 from openregistry.lots.core.utils import (
     update_logging_context,
     get_now,
@@ -9,18 +14,27 @@ from openregistry.lots.core.utils import (
     set_first_document_fields,
     get_type,
     update_document_url,
-    calculate_business_date
 )
+from openregistry.lots.core.models import IsoDateTimeType
+from openregistry.lots.loki.business_date import calculate_business_date
+from openregistry.lots.loki.metrics import count_rejections
+from openregistry.lots.loki.roles import auction_role_table
+from openregistry.lots.loki.utils import get_etag
 from openregistry.lots.core.validation import (
     validate_data
 )
 from openregistry.lots.loki.constants import (
     DAYS_AFTER_RECTIFICATION_PERIOD,
-    RECTIFICATION_PERIOD_DURATION
+    RECTIFICATION_PERIOD_DURATION,
+    BULK_CREATE_MAX_LOTS,
+    DUE_LOTS_FEED_LIMIT,
+    DUE_LOTS_FEED_MAX_LIMIT,
+    COLLECTION_MAX_LIMIT
 )
 
 
 # Document Validation
+@count_rejections
 def validate_document_data(request, **kwargs):
     context = request.context if 'documents' in request.context else request.context.__parent__
     model = type(context).documents.model_class
@@ -46,6 +60,7 @@ def validate_document_data(request, **kwargs):
     return data
 
 
+@count_rejections
 def validate_file_upload(request, **kwargs):
     update_logging_context(request, {'document_id': '__new__'})
     if request.registry.use_docservice and request.content_type == "application/json":
@@ -58,6 +73,7 @@ def validate_file_upload(request, **kwargs):
         request.validated['file'] = request.POST['file']
 
 
+@count_rejections
 def validate_document_operation_in_not_allowed_lot_status(request, error_handler, **kwargs):
     status = request.validated['lot_status']
     if status not in ['pending', 'composing']:
@@ -65,11 +81,9 @@ def validate_document_operation_in_not_allowed_lot_status(request, error_handler
                               'Can\'t update document in current ({}) lot status'.format(status))
 
 
+@count_rejections
 def rectificationPeriod_document_validation(request, error_handler, **kwargs):
-    is_period_ended = bool(
-        request.validated['lot'].rectificationPeriod and
-        request.validated['lot'].rectificationPeriod.endDate < get_now()
-    )
+    is_period_ended = request.lot_state.rectification_period_ended
     if bool((is_period_ended and request.validated['document'].documentType != 'cancellationDetails') and
             request.method == 'POST'):
         request.errors.add(
@@ -87,6 +101,7 @@ def rectificationPeriod_document_validation(request, error_handler, **kwargs):
 
 
 # Item validation
+@count_rejections
 def validate_item_data(request, error_handler, **kwargs):
     update_logging_context(request, {'item_id': '__new__'})
     context = request.context if 'items' in request.context else request.context.__parent__
@@ -94,6 +109,7 @@ def validate_item_data(request, error_handler, **kwargs):
     validate_data(request, model, "item")
 
 
+@count_rejections
 def validate_patch_item_data(request, error_handler, **kwargs):
     update_logging_context(request, {'item_id': '__new__'})
     context = request.context if 'items' in request.context else request.context.__parent__
@@ -101,15 +117,16 @@ def validate_patch_item_data(request, error_handler, **kwargs):
     validate_data(request, model)
 
 
+@count_rejections
 def rectificationPeriod_item_validation(request, error_handler, **kwargs):
-    if bool(request.validated['lot'].rectificationPeriod and
-            request.validated['lot'].rectificationPeriod.endDate < get_now()):
+    if request.lot_state.rectification_period_ended:
         request.errors.add('body', 'mode', 'You can\'t change items after rectification period')
         request.errors.status = 403
         raise error_handler(request)
 
 
 # Decision validation
+@count_rejections
 def validate_decision_by_decisionOf(request, error_handler, **kwargs):
     decision = request.validated['decision']
     if decision.decisionOf != 'lot':
@@ -123,11 +140,9 @@ def validate_decision_by_decisionOf(request, error_handler, **kwargs):
 
 
 # Auction validation
+@count_rejections
 def rectificationPeriod_auction_document_validation(request, error_handler, **kwargs):
-    is_period_ended = bool(
-        request.validated['lot'].rectificationPeriod and
-        request.validated['lot'].rectificationPeriod.endDate < get_now()
-    )
+    is_period_ended = request.lot_state.rectification_period_ended
     if is_period_ended and request.method == 'POST':
         request.errors.add(
             'body',
@@ -143,11 +158,9 @@ def rectificationPeriod_auction_document_validation(request, error_handler, **kw
         raise error_handler(request)
 
 
+@count_rejections
 def rectificationPeriod_auction_validation(request, error_handler, **kwargs):
-    is_rectificationPeriod_finished = bool(
-        request.validated['lot'].rectificationPeriod and
-        request.validated['lot'].rectificationPeriod.endDate < get_now()
-    )
+    is_rectificationPeriod_finished = request.lot_state.rectification_period_ended
 
     if request.authenticated_role not in ['convoy', 'concierge'] and is_rectificationPeriod_finished:
         request.errors.add('body', 'mode', 'You can\'t change auctions after rectification period')
@@ -155,6 +168,7 @@ def rectificationPeriod_auction_validation(request, error_handler, **kwargs):
         raise error_handler(request)
 
 
+@count_rejections
 def validate_auction_data(request, error_handler, **kwargs):
     update_logging_context(request, {'auction_id': '__new__'})
     context = request.context if 'auctions' in request.context else request.context.__parent__
@@ -162,6 +176,71 @@ def validate_auction_data(request, error_handler, **kwargs):
     validate_data(request, model)
 
 
+@count_rejections
+def validate_auctions_bulk_data(request, error_handler, **kwargs):
+    """Validate list of changes of lot auctions, each change with id of the auction
+
+    Every change is validated as a patch of one auction and filtered by the
+    auction edit role, nested fields included. Validated auctions
+    are saved to request.validated['auctions'] as (position, auction) pairs.
+    """
+    if request.authenticated_role in ('convoy', 'concierge'):
+        request.errors.add('body', 'role', 'Can\'t update several auctions at once by {}'.format(
+            request.authenticated_role))
+        request.errors.status = 403
+        raise error_handler(request)
+
+    lot = request.validated['lot']
+    changes = request.json.get('data') if isinstance(request.json, dict) else None
+    if not isinstance(changes, list) or not changes or not all(isinstance(i, dict) for i in changes):
+        request.errors.add('body', 'data', 'Data should be non-empty list of auctions changes')
+        request.errors.status = 422
+        raise error_handler(request)
+
+    positions = dict((auction.id, position) for position, auction in enumerate(lot.auctions))
+    ids = [change.get('id') for change in changes]
+    if len(set(ids)) != len(ids) or not all(i in positions for i in ids):
+        request.errors.add('body', 'id', 'Every change should have id of different auction of the lot')
+        request.errors.status = 422
+        raise error_handler(request)
+
+    validated = []
+    for change in changes:
+        position = positions[change['id']]
+        auction = lot.auctions[position]
+        model = type(auction)
+        role = auction_role_table.resolve(
+            request.authenticated_role, (auction.tenderAttempts, auction.procurementMethodType)
+        )
+        if role not in model._options.roles:
+            request.errors.add('url', 'role', 'Forbidden')
+            request.errors.status = 403
+            raise error_handler(request)
+        initial_data = auction.serialize()
+        # the same steps as validate_data takes for a patch of one auction
+        try:
+            new_auction = model(initial_data)
+            new_patch = apply_data_patch(initial_data, change)
+            if new_patch:
+                new_auction.import_data(new_patch, partial=True, strict=True)
+            new_auction.__parent__ = lot
+            new_auction.validate()
+        except (ModelConversionError, ModelValidationError) as e:
+            for name in e.messages:
+                request.errors.add('body', name, {auction.id: e.messages[name]})
+            continue
+        data = new_auction.to_patch(role)
+        new_auction = model(apply_data_patch(initial_data, data) or initial_data)
+        new_auction.__parent__ = lot
+        validated.append((position, new_auction))
+
+    if request.errors:
+        request.errors.status = 422
+        raise error_handler(request)
+    request.validated['auctions'] = validated
+
+
+@count_rejections
 def validate_update_auction_in_not_allowed_status(request, error_handler, **kwargs):
     is_convoy_or_concierge = bool(request.authenticated_role in ['convoy', 'concierge'])
     if not is_convoy_or_concierge and request.validated['lot_status'] not in ['draft', 'composing', 'pending']:
@@ -172,6 +251,7 @@ def validate_update_auction_in_not_allowed_status(request, error_handler, **kwar
         )
 
 
+@count_rejections
 def validate_update_auction_document_in_not_allowed_status(request, error_handler, **kwargs):
     if request.validated['lot_status'] not in ['draft', 'composing', 'pending']:
         raise_operation_error(
@@ -182,6 +262,7 @@ def validate_update_auction_document_in_not_allowed_status(request, error_handle
 
 
 # Contract validation
+@count_rejections
 def validate_contracts_data(request, error_handler, **kwargs):
     update_logging_context(request, {'auction_id': '__new__'})
     context = request.context if 'auctions' in request.context else request.context.__parent__
@@ -201,8 +282,8 @@ def get_fields_errors(required_fields, auction):
     return err_msg
 
 
-def get_auction_validation_result(lot):
-    auctions = sorted(lot.auctions, key=lambda a: a.tenderAttempts)
+def get_auction_validation_result(auctions):
+    """Errors of required fields of first and second auctions, `auctions` sorted by tenderAttempts"""
     english = auctions[0]
     second_english = auctions[1]
 
@@ -223,10 +304,12 @@ def get_auction_validation_result(lot):
     return auction_error_message
 
 
+@count_rejections
 def validate_verification_status(request, error_handler):
     if request.validated['data'].get('status') == 'verification' and request.context.status == 'composing':
         # Decision validation
-        if not any(decision.decisionOf == 'lot' for decision in request.context.decisions):
+        lot_state = request.lot_state
+        if 'lot' not in lot_state.decisions_of:
             raise_operation_error(
                         request,
                         error_handler,
@@ -235,10 +318,9 @@ def validate_verification_status(request, error_handler):
 
         # Auction validation
         lot = request.validated['lot']
-        auctions = sorted(lot.auctions, key=lambda a: a.tenderAttempts)
-        english = auctions[0]
+        english = lot_state.sorted_auctions[0]
 
-        auction_error_message = get_auction_validation_result(lot)
+        auction_error_message = get_auction_validation_result(lot_state.sorted_auctions)
 
         # Raise errors from first and second auction
         if auction_error_message['description']:
@@ -249,7 +331,7 @@ def validate_verification_status(request, error_handler):
         duration = DAYS_AFTER_RECTIFICATION_PERIOD + RECTIFICATION_PERIOD_DURATION
 
         min_auction_start_date = calculate_business_date(
-            start=get_now(),
+            start=lot_state.now,
             delta=duration,
             context=lot,
             working_days=True
@@ -280,11 +362,11 @@ def validate_verification_status(request, error_handler):
             raise error_handler(request)
 
 
+@count_rejections
 def validate_deleted_status(request, error_handler):
     # Moving lot.status to 'deleted' is allowed only when at least one of lot.documents
     # have documentOf = 'cancellationDetails'
-    can_be_deleted = any([doc.documentType == 'cancellationDetails' for doc in request.context['documents']])
-    if request.json['data'].get('status') == 'pending.deleted' and not can_be_deleted:
+    if request.json['data'].get('status') == 'pending.deleted' and not request.lot_state.has_cancellation_details:
         request.errors.add(
             'body',
             'mode',
@@ -294,12 +376,11 @@ def validate_deleted_status(request, error_handler):
         raise error_handler(request)
 
 
+@count_rejections
 def validate_pending_status(request, error_handler):
     # Check if at least one decision with type = 'asset' is available in lot.decisions
     # or patching to pending status is going with decisions
-    is_decisions_in_context = any(
-        decision.decisionOf == 'asset' for decision in request.context.decisions
-    )
+    is_decisions_in_context = 'asset' in request.lot_state.decisions_of
     is_decision_in_data = any(
         decision['decisionOf'] == 'asset' for decision in request.validated['data'].get('decisions', [])
     )
@@ -324,6 +405,7 @@ def validate_pending_status(request, error_handler):
 
 
 # Related process validation
+@count_rejections
 def validate_related_process_operation_in_not_allowed_lot_status(request, error_handler, **kwargs):
     status = request.validated['lot_status']
     if request.authenticated_role == 'concierge' and status not in ['verification']:
@@ -332,3 +414,119 @@ def validate_related_process_operation_in_not_allowed_lot_status(request, error_
     if request.authenticated_role == 'lot_owner' and status not in ['draft', 'composing']:
         raise_operation_error(request, error_handler,
                               'Can\'t update relatedProcess in current ({}) lot status'.format(status))
+
+
+# Conditional GET
+def validate_not_modified(request, error_handler, **kwargs):
+    """Set ETag of lot sub-resource, respond with 304 before serialization when it matches If-None-Match"""
+    if request.params.get('download'):
+        return
+    etag = get_etag(request.validated['lot'], request.path_qs)
+    request.response.etag = etag
+    if etag in request.if_none_match:
+        response = HTTPNotModified()
+        response.etag = etag
+        raise response
+
+
+# Chronograph validation
+@count_rejections
+def validate_chronograph_tick_data(request, error_handler, **kwargs):
+    if request.authenticated_role != 'chronograph':
+        request.errors.add('body', 'accreditation', 'Can\'t check lots statuses not by chronograph')
+        request.errors.status = 403
+        raise error_handler(request)
+
+    until = request.json.get('data', {}).get('until')
+    if not until:
+        request.errors.add('body', 'until', ['This field is required.'])
+        request.errors.status = 422
+        raise error_handler(request)
+    try:
+        request.validated['until'] = IsoDateTimeType().to_native(until)
+    except ConversionError as e:
+        request.errors.add('body', 'until', e.messages)
+        request.errors.status = 422
+        raise error_handler(request)
+
+
+# Bulk creation validation
+@count_rejections
+def validate_bulk_lots_data(request, error_handler, **kwargs):
+    levels = request.registry.accreditation['lot']['loki']['create']
+    if not any(request.check_accreditation(str(level)) for level in levels):
+        request.errors.add('body', 'accreditation', 'Broker Accreditation level does not permit lot creation')
+        request.errors.status = 403
+        raise error_handler(request)
+
+    data = request.json.get('data') if isinstance(request.json, dict) else None
+    if not isinstance(data, list) or not data or not all(isinstance(i, dict) for i in data):
+        request.errors.add('body', 'data', 'Data should be non-empty list of lots')
+        request.errors.status = 422
+        raise error_handler(request)
+    if len(data) > BULK_CREATE_MAX_LOTS:
+        request.errors.add('body', 'data', 'Can\'t create more than {} lots at once'.format(BULK_CREATE_MAX_LOTS))
+        request.errors.status = 422
+        raise error_handler(request)
+    request.validated['lots_data'] = data
+
+
+@count_rejections
+def validate_due_lots_params(request, error_handler, **kwargs):
+    params = request.params
+    try:
+        until = IsoDateTimeType().to_native(params['until']) if params.get('until') else get_now()
+    except ConversionError as e:
+        request.errors.add('url', 'until', e.messages)
+        request.errors.status = 422
+        raise error_handler(request)
+
+    limit = params.get('limit', DUE_LOTS_FEED_LIMIT)
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= DUE_LOTS_FEED_MAX_LIMIT:
+        request.errors.add('url', 'limit', 'limit should be integer from 1 to {}'.format(DUE_LOTS_FEED_MAX_LIMIT))
+        request.errors.status = 422
+        raise error_handler(request)
+
+    offset = params.get('offset')
+    if offset:
+        # offset is the key of the first row of the page: "<next_check>,<lot id>"
+        offset = offset.split(',')
+        if len(offset) != 2:
+            request.errors.add('url', 'offset', 'Invalid offset provided')
+            request.errors.status = 422
+            raise error_handler(request)
+
+    request.validated['until'] = until
+    request.validated['limit'] = limit
+    request.validated['offset'] = offset
+
+
+@count_rejections
+def validate_collection_params(request, error_handler, **kwargs):
+    """limit and offset of sub-resources listing, whole collection is listed without limit"""
+    params = request.params
+    limit, offset = params.get('limit'), params.get('offset', 0)
+    try:
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        limit = 0
+    if limit is not None and not 0 < limit <= COLLECTION_MAX_LIMIT:
+        request.errors.add('url', 'limit', 'limit should be integer from 1 to {}'.format(COLLECTION_MAX_LIMIT))
+        request.errors.status = 422
+        raise error_handler(request)
+
+    try:
+        offset = int(offset)
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        request.errors.add('url', 'offset', 'offset should be non-negative integer')
+        request.errors.status = 422
+        raise error_handler(request)
+
+    request.validated['limit'] = limit
+    request.validated['offset'] = offset
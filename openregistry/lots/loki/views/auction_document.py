@@ -2,12 +2,9 @@
 from openregistry.lots.core.utils import (
     get_file,
     update_file_content_type,
-    json_view,
     context_unpack,
     APIResource,
-    save_lot,
     oplotsresource,
-    apply_patch,
 )
 
 from openregistry.lots.core.validation import (
@@ -16,7 +13,19 @@ from openregistry.lots.core.validation import (
 from openregistry.lots.core.validation import (
     validate_lot_document_update_not_by_author_or_lot_owner,
 )
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
+    save_lot,
+)
+from openregistry.lots.loki.traversal import factory
+from openregistry.lots.loki.utils import (
+    get_latest_documents,
+    get_previous_versions,
+    save_lot_changes
+)
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
     validate_update_auction_document_in_not_allowed_status,
     rectificationPeriod_auction_document_validation,
     validate_file_upload,
@@ -46,19 +55,18 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/auctions/{auction_id}/documents',
                 path='/lots/{lot_id}/auctions/{auction_id}/documents/{document_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Auction related binary files (PDFs, etc.)")
 class AuctionDocumentResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def collection_get(self):
         """Auction Documents List"""
-        if self.request.params.get('all', '`'):
-            collection_data = [i.serialize("view") for i in self.context.documents]
+        if self.request.params.get('all', ''):
+            documents = self.context.documents
         else:
-            collection_data = sorted(dict([
-                (i.id, i.serialize("view"))
-                for i in self.context.documents
-            ]).values(), key=lambda i: i['dateModified'])
+            documents = get_latest_documents(self.context)
+        collection_data = [i.serialize("view") for i in documents]
         return {'data': collection_data}
 
     @json_view(content_type="application/json", permission='upload_lot_auction_documents', validators=post_validators)
@@ -85,7 +93,7 @@ class AuctionDocumentResource(APIResource):
                                                             )
             return {'data': document.serialize("view")}
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Auction Document Read"""
         if self.request.params.get('download'):
@@ -93,9 +101,7 @@ class AuctionDocumentResource(APIResource):
         document = self.request.validated['document']
         document_data = document.serialize("view")
         document_data['previousVersions'] = [
-            i.serialize("view")
-            for i in self.request.validated['documents']
-            if i.url != document.url
+            i.serialize("view") for i in get_previous_versions(document)
         ]
         return {'data': document_data}
 
@@ -114,7 +120,8 @@ class AuctionDocumentResource(APIResource):
     @json_view(content_type="application/json", permission='upload_lot_auction_documents', validators=patch_validators)
     def patch(self):
         """Auction Document Update"""
-        if apply_patch(self.request, src=self.request.context.serialize()):
+        apply_patch(self.request, save=False, src=self.request.context.serialize())
+        if save_lot_changes(self.request):
             update_file_content_type(self.request)
             self.LOGGER.info(
                 'Updated auction document {}'.format(self.request.context.id),
@@ -1,22 +1,34 @@
 # -*- coding: utf-8 -*-
 from openregistry.lots.core.utils import (
-    json_view,
     context_unpack,
     APIResource,
 )
 from openregistry.lots.core.utils import (
-    oplotsresource, apply_patch, save_lot
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
 )
+from openregistry.lots.loki.traversal import factory
 from openregistry.lots.loki.utils import (
+    save_lot_changes,
     update_auctions,
     process_convoy_auction_report_result,
     process_concierge_auction_status_change
 )
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
+    validate_auctions_bulk_data,
     validate_auction_data,
     rectificationPeriod_auction_validation,
     validate_update_auction_in_not_allowed_status
 )
+collection_patch_validators = (
+    rectificationPeriod_auction_validation,
+    validate_update_auction_in_not_allowed_status,
+    validate_auctions_bulk_data
+)
 patch_validators = (
     validate_auction_data,
     rectificationPeriod_auction_validation,
@@ -28,16 +40,32 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/auctions',
                 path='/lots/{lot_id}/auctions/{auction_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Lot related auctions")
 class LotAuctionResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def collection_get(self):
         """Lot Auction List"""
         collection_data = [i.serialize("view") for i in self.context.auctions]
         return {'data': collection_data}
 
-    @json_view(permission='view_lot')
+    @json_view(content_type="application/json", permission='upload_lot_auctions',
+               validators=collection_patch_validators)
+    def collection_patch(self):
+        """Lot Auctions Update"""
+        lot = self.request.validated['lot']
+        for position, auction in self.request.validated['auctions']:
+            lot.auctions[position] = auction
+        update_auctions(lot)
+        if save_lot_changes(self.request):
+            self.LOGGER.info(
+                'Updated lot auctions {}'.format(', '.join(a.id for _, a in self.request.validated['auctions'])),
+                extra=context_unpack(self.request, {'MESSAGE_ID': 'lot_auctions_patch'})
+            )
+            return {'data': [i.serialize("view") for i in lot.auctions]}
+
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Lot Auction Read"""
         auction = self.request.validated['auction']
@@ -54,7 +82,7 @@ class LotAuctionResource(APIResource):
         elif self.request.authenticated_role == 'concierge':
             process_concierge_auction_status_change(self.request)
 
-        if save_lot(self.request):
+        if save_lot_changes(self.request):
             self.LOGGER.info(
                 'Updated lot auction {}'.format(self.request.context.id),
                 extra=context_unpack(self.request, {'MESSAGE_ID': 'lot_auction_patch'})
@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
 from openregistry.lots.core.utils import (
-    json_view,
     context_unpack,
     APIResource,
 )
 from openregistry.lots.core.utils import (
-    oplotsresource, apply_patch, save_lot
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
 )
+from openregistry.lots.loki.traversal import factory
 from openregistry.lots.loki.utils import (
-    process_caravan_contract_report_result
+    process_caravan_contract_report_result,
+    save_lot_changes
 )
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
     validate_contracts_data,
 )
 patch_validators = (
@@ -22,16 +28,17 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/contracts',
                 path='/lots/{lot_id}/contracts/{contract_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Lot related contracts")
 class LotContractResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def collection_get(self):
         """Lot Contract List"""
         collection_data = [i.serialize("view") for i in self.context.contracts]
         return {'data': collection_data}
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Lot Contract Read"""
         contract = self.request.validated['contract']
@@ -43,7 +50,7 @@ class LotContractResource(APIResource):
         apply_patch(self.request, save=False, src=self.request.context.serialize())
         if self.request.authenticated_role == 'caravan':
             process_caravan_contract_report_result(self.request)
-        if save_lot(self.request):
+        if save_lot_changes(self.request):
             self.LOGGER.info(
                 'Updated lot contract {}'.format(self.request.context.id),
                 extra=context_unpack(self.request, {'MESSAGE_ID': 'lot_contract_patch'})
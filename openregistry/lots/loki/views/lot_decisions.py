@@ -1,12 +1,11 @@
 # -*- coding: utf-8 -*-
 from openregistry.lots.core.utils import (
     update_file_content_type,
-    json_view,
     context_unpack,
     APIResource,
 )
 from openregistry.lots.core.utils import (
-    save_lot, oplotsresource, apply_patch,
+    oplotsresource,
 )
 from openregistry.lots.core.validation import (
     validate_decision_post,
@@ -14,7 +13,14 @@ from openregistry.lots.core.validation import (
     validate_decision_patch_data,
     validate_decision_update_in_not_allowed_status
 )
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
+    save_lot,
+)
+from openregistry.lots.loki.traversal import factory
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
     validate_decision_by_decisionOf
 )
 
@@ -35,10 +41,11 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/decisions',
                 path='/lots/{lot_id}/decisions/{decision_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Lot related decisions")
 class LotDecisionResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def collection_get(self):
         """Lot Decision List"""
         collection_data = [i.serialize("view") for i in self.context.decisions]
@@ -63,7 +70,7 @@ class LotDecisionResource(APIResource):
                                                             )
             return {'data': decision.serialize("view")}
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Lot Decision Read"""
         decision = self.request.validated['decision']
@@ -2,12 +2,9 @@
 from openregistry.lots.core.utils import (
     get_file,
     update_file_content_type,
-    json_view,
     context_unpack,
     APIResource,
-    save_lot,
     oplotsresource,
-    apply_patch,
 )
 
 from openregistry.lots.core.validation import (
@@ -16,7 +13,21 @@ from openregistry.lots.core.validation import (
 from openregistry.lots.core.validation import (
     validate_lot_document_update_not_by_author_or_lot_owner
 )
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
+    save_lot,
+)
+from openregistry.lots.loki.traversal import factory
+from openregistry.lots.loki.utils import (
+    get_latest_documents,
+    get_previous_versions,
+    save_lot_changes,
+    stream_collection
+)
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
+    validate_collection_params,
     validate_document_operation_in_not_allowed_lot_status,
     rectificationPeriod_document_validation,
     validate_file_upload,
@@ -46,20 +57,18 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/documents',
                 path='/lots/{lot_id}/documents/{document_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Lot related binary files (PDFs, etc.)")
 class LotDocumentResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_collection_params, validate_not_modified))
     def collection_get(self):
         """Lot Documents List"""
         if self.request.params.get('all', ''):
-            collection_data = [i.serialize("view") for i in self.context.documents]
+            documents = self.context.documents
         else:
-            collection_data = sorted(dict([
-                (i.id, i.serialize("view"))
-                for i in self.context.documents
-            ]).values(), key=lambda i: i['dateModified'])
-        return {'data': collection_data}
+            documents = get_latest_documents(self.context)
+        return stream_collection(self.request, documents)
 
     @json_view(content_type="application/json", permission='upload_lot_documents', validators=post_validators)
     def collection_post(self):
@@ -81,7 +90,7 @@ class LotDocumentResource(APIResource):
                                                             )
             return {'data': document.serialize("view")}
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Lot Document Read"""
         if self.request.params.get('download'):
@@ -89,9 +98,7 @@ class LotDocumentResource(APIResource):
         document = self.request.validated['document']
         document_data = document.serialize("view")
         document_data['previousVersions'] = [
-            i.serialize("view")
-            for i in self.request.validated['documents']
-            if i.url != document.url
+            i.serialize("view") for i in get_previous_versions(document)
         ]
         return {'data': document_data}
 
@@ -110,7 +117,8 @@ class LotDocumentResource(APIResource):
     @json_view(content_type="application/json", permission='upload_lot_documents', validators=patch_validators)
     def patch(self):
         """Lot Document Update"""
-        if apply_patch(self.request, src=self.request.context.serialize()):
+        apply_patch(self.request, save=False, src=self.request.context.serialize())
+        if save_lot_changes(self.request):
             update_file_content_type(self.request)
             self.LOGGER.info(
                 'Updated lot document {}'.format(self.request.context.id),
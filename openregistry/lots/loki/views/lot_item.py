@@ -1,17 +1,27 @@
 # -*- coding: utf-8 -*-
 from openregistry.lots.core.utils import (
     update_file_content_type,
-    json_view,
     context_unpack,
     APIResource,
 )
 from openregistry.lots.core.utils import (
-    save_lot, oplotsresource, apply_patch,
+    oplotsresource,
 )
 from openregistry.lots.core.validation import (
     validate_update_item_in_not_allowed_status
 )
+from openregistry.lots.loki.profiling import (
+    apply_patch,
+    json_view,
+    save_lot,
+)
+from openregistry.lots.loki.traversal import factory
+from openregistry.lots.loki.utils import (
+    stream_collection
+)
 from openregistry.lots.loki.validation import (
+    validate_not_modified,
+    validate_collection_params,
     validate_item_data,
     rectificationPeriod_item_validation,
     validate_patch_item_data
@@ -33,14 +43,14 @@ patch_validators = (
                 collection_path='/lots/{lot_id}/items',
                 path='/lots/{lot_id}/items/{item_id}',
                 _internal_type='loki',
+                factory=factory,
                 description="Lot related items")
 class LotItemResource(APIResource):
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_collection_params, validate_not_modified))
     def collection_get(self):
         """Lot Item List"""
-        collection_data = [i.serialize("view") for i in self.context.items]
-        return {'data': collection_data}
+        return stream_collection(self.request, self.context.items)
 
     @json_view(content_type="application/json", permission='upload_lot_items', validators=(post_validators))
     def collection_post(self):
@@ -61,7 +71,7 @@ class LotItemResource(APIResource):
                                                             )
             return {'data': item.serialize("view")}
 
-    @json_view(permission='view_lot')
+    @json_view(permission='view_lot', validators=(validate_not_modified,))
     def get(self):
         """Lot Item Read"""
         item = self.request.validated['item']
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from openregistry.lots.core.utils import (
+    context_unpack,
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+)
+from openregistry.lots.loki.utils import (
+    create_lots
+)
+from openregistry.lots.loki.validation import (
+    validate_bulk_lots_data
+)
+
+post_validators = (
+    validate_bulk_lots_data,
+)
+
+
+@oplotsresource(name='loki:Lots Bulk',
+                path='/lots/loki/bulk',
+                description="Bulk creation of loki lots")
+class LotsBulkResource(APIResource):
+
+    @json_view(content_type="application/json", permission='create_lot', validators=post_validators)
+    def post(self):
+        """Create lots from list of lots data"""
+        results = create_lots(self.request, self.request.validated['lots_data'])
+        created = len([i for i in results if 'data' in i])
+        self.LOGGER.info(
+            'Created {} of {} lots'.format(created, len(results)),
+            extra=context_unpack(self.request, {'MESSAGE_ID': 'lots_bulk_create'})
+        )
+        self.request.response.status = 201 if created else 422
+        return {'data': results}
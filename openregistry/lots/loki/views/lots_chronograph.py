@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from openregistry.lots.core.utils import (
+    context_unpack,
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+)
+from openregistry.lots.loki.utils import (
+    check_due_lots_status
+)
+from openregistry.lots.loki.validation import (
+    validate_chronograph_tick_data
+)
+
+post_validators = (
+    validate_chronograph_tick_data,
+)
+
+
+@oplotsresource(name='loki:Lots Chronograph',
+                path='/lots/loki/chronograph',
+                description="Bulk status check of lots by chronograph")
+class LotsChronographResource(APIResource):
+
+    @json_view(content_type="application/json", permission='edit_lot', validators=post_validators)
+    def post(self):
+        """Check status of all lots with next_check before `until`"""
+        result = check_due_lots_status(self.request, self.request.validated['until'])
+        self.LOGGER.info(
+            'Checked lots status: {} changed, {} conflicts'.format(
+                len(result['changed']), len(result['conflicts'])
+            ),
+            extra=context_unpack(self.request, {'MESSAGE_ID': 'lots_chronograph_check'})
+        )
+        return {'data': result}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from openregistry.lots.core.utils import (
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+)
+from openregistry.lots.loki.utils import (
+    get_due_lots
+)
+from openregistry.lots.loki.validation import (
+    validate_due_lots_params
+)
+
+get_validators = (
+    validate_due_lots_params,
+)
+
+
+@oplotsresource(name='loki:Due Lots',
+                path='/lots/loki/due',
+                description="Lots which should be checked by chronograph, sorted by next_check")
+class LotsDueResource(APIResource):
+
+    @json_view(permission='view_listing', validators=get_validators)
+    def get(self):
+        """Due Lots Feed"""
+        limit = self.request.validated['limit']
+        rows = get_due_lots(
+            self.request.registry.db,
+            self.request.validated['until'],
+            startkey=self.request.validated['offset'],
+            limit=limit + 1,
+            include_docs=False
+        )
+        data = {
+            'data': [
+                {'id': row.key[1], 'next_check': row.key[0]}
+                for row in rows[:limit]
+            ]
+        }
+        if len(rows) > limit:
+            params = dict(self.request.params)
+            params['until'] = self.request.validated['until'].isoformat()
+            params['offset'] = ','.join(rows[limit].key)
+            data['next_page'] = {
+                'offset': params['offset'],
+                'path': self.request.current_route_path(_query=params),
+                'uri': self.request.current_route_url(_query=params)
+            }
+        return data
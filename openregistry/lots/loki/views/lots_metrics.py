@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from pyramid.response import Response
+
+from openregistry.lots.core.utils import (
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+)
+from openregistry.lots.loki.metrics import CONTENT_TYPE, registry
+from openregistry.lots.loki.traversal import INTERNALS_PERMISSION, InternalsRoot
+
+
+@oplotsresource(name='loki:Lots Metrics',
+                path='/lots/loki/metrics',
+                factory=InternalsRoot,
+                description="Lot lifecycle and view metrics of this process in Prometheus text format")
+class LotsMetricsResource(APIResource):
+
+    @json_view(permission=INTERNALS_PERMISSION)
+    def get(self):
+        """Lots Metrics"""
+        return Response(body=registry.render().encode('utf-8'), content_type=CONTENT_TYPE, charset='utf-8')
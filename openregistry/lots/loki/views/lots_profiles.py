@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from openregistry.lots.core.utils import (
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+    profiles,
+)
+from openregistry.lots.loki.traversal import INTERNALS_PERMISSION, InternalsRoot
+
+
+@oplotsresource(name='loki:Lots Profiles',
+                path='/lots/loki/profiles',
+                factory=InternalsRoot,
+                description="Latest profiles of loki views, recorded with profiling enabled")
+class LotsProfilesResource(APIResource):
+
+    @json_view(permission=INTERNALS_PERMISSION)
+    def get(self):
+        """Lots Views Profiles"""
+        return {'data': profiles.dump()}
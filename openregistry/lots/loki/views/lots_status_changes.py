@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from openregistry.lots.core.utils import (
+    APIResource,
+    oplotsresource,
+)
+from openregistry.lots.loki.profiling import (
+    json_view,
+)
+from openregistry.lots.loki.state_machine import lot_state_machine
+
+
+@oplotsresource(name='loki:Lots Status Changes',
+                path='/lots/loki/status_changes',
+                description="Allowed status transitions of loki lots and their side effects")
+class LotsStatusChangesResource(APIResource):
+
+    @json_view(permission='view_listing')
+    def get(self):
+        """Lot Status Transitions"""
+        return {'data': lot_state_machine.describe()}
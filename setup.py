@@ -12,6 +12,9 @@ entry_points = {
     ],
     'lots.loki.migration': [
         'main = openregistry.lots.loki.migration:migrate'
+    ],
+    'console_scripts': [
+        'loki_migrate = openregistry.lots.loki.migration:main'
     ]
 }
 